@@ -0,0 +1,126 @@
+from reflex.config import get_config
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, RedirectResponse, Response
+from starlette.routing import Route
+
+from app.services.chat_context import prompt_token_stats
+from app.services.fast_answers import fast_path_stats
+from app.services.file_io import run_io
+from app.services.menu_cache import menu_cache
+from app.services.menu_html import static_menu_page
+from app.services.menu_repository import menu_repository
+from app.services.menu_store import on_menu_saved
+from app.services.metrics import metrics
+from app.services.qr import QR_FORMATS, guest_menu_url, qr_cache
+from app.services.response_cache import response_cache
+from app.services.settings import (
+    MENU_BASE_URL,
+    QR_DEFAULT_SIZE,
+    QR_MAX_AGE_SECONDS,
+    QR_MAX_SIZE,
+)
+from app.services.tts_cache import tts_cache
+
+QR_MIN_SIZE = 64
+
+
+def menu_base_url() -> str:
+    """Returns the frontend origin that menu links and QR codes point at."""
+    return (MENU_BASE_URL or get_config().deploy_url or "").rstrip("/")
+
+
+def backend_url() -> str:
+    return get_config().api_url.rstrip("/")
+
+
+def public_menu_url(menu_id: str) -> str:
+    """Returns the link guests get for a menu: its static page, or the Reflex page."""
+    return guest_menu_url(menu_id, menu_base_url(), backend_url())
+
+
+def qr_src(menu_id: str) -> str:
+    """Returns the backend URL of a menu's QR code."""
+    return f"{backend_url()}/qr/{menu_id}"
+
+
+def prerender_menu_page(menu_id: str):
+    """Renders and compresses a menu's static page as soon as it is saved."""
+    static_menu_page(menu_id, menu_base_url())
+
+
+on_menu_saved(prerender_menu_page)
+
+metrics.register_stats("menu_cache", menu_cache.stats)
+metrics.register_stats("response_cache", response_cache.stats)
+metrics.register_stats("tts_cache", tts_cache.stats)
+metrics.register_stats("qr_cache", qr_cache.stats)
+metrics.register_stats("fast_path", fast_path_stats.stats)
+metrics.register_stats("chat_prompt_tokens", prompt_token_stats.stats)
+
+
+async def qr_code(request: Request) -> Response:
+    """Renders a menu's QR code: `/qr/<menu_id>?format=png|svg&size=<px>`."""
+    menu_id = request.path_params["menu_id"]
+    fmt = request.query_params.get("format", "png")
+    if fmt not in QR_FORMATS:
+        return PlainTextResponse(f"format must be one of {', '.join(QR_FORMATS)}", 400)
+    try:
+        size = int(request.query_params.get("size", QR_DEFAULT_SIZE))
+    except ValueError:
+        return PlainTextResponse("size must be an integer", 400)
+    size = min(max(size, QR_MIN_SIZE), QR_MAX_SIZE)
+    if await run_io(menu_repository.version, menu_id) is None:
+        return PlainTextResponse("Menu not found", 404)
+    rendered = await run_io(qr_cache.get, public_menu_url(menu_id), fmt, size)
+    headers = {
+        "ETag": rendered.etag,
+        "Cache-Control": f"public, max-age={QR_MAX_AGE_SECONDS}",
+    }
+    if rendered.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(rendered.body, media_type=rendered.media_type, headers=headers)
+
+
+async def menu_page(request: Request) -> Response:
+    """Serves a menu's static page, gzipped when the client accepts it.
+
+    `/m/<menu_id>` always revalidates against the ETag, so guests see edits
+    at once; `/m/<menu_id>/<etag>` names one rendering and is cached forever.
+    """
+    menu_id = request.path_params["menu_id"]
+    page = await run_io(static_menu_page, menu_id, menu_base_url())
+    if page is None:
+        return PlainTextResponse("Menu not found", 404)
+    tag = request.path_params.get("tag")
+    if tag is not None and tag != page.tag:
+        return RedirectResponse(f"/m/{menu_id}", 302)
+    headers = {
+        "ETag": page.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": (
+            "public, max-age=31536000, immutable" if tag else "public, no-cache"
+        ),
+        "Content-Location": f"/m/{menu_id}/{page.tag}",
+    }
+    if page.tag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(page.gzip, media_type="text/html", headers=headers)
+    return Response(page.html, media_type="text/html", headers=headers)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus scrape target: stage latency histograms and component stats."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+api = Starlette(
+    routes=[
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/qr/{menu_id}", qr_code, methods=["GET"]),
+        Route("/m/{menu_id}", menu_page, methods=["GET"]),
+        Route("/m/{menu_id}/{tag}", menu_page, methods=["GET"]),
+    ]
+)
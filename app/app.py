@@ -4,6 +4,12 @@ from app.states.menu_state import MenuState, MenuPageState
 from app.components.upload import upload_page
 from app.components.chat import chat_interface
 from app.components.call import call_interface
+from app.api import api
+from app.services.providers import provider_lifespan
+from app.services.jobs import job_queue_lifespan
+from app.services.metrics import loop_lag_lifespan
+from app.services.retention import retention_lifespan
+from app.states.upload_state import UploadState
 
 
 def index() -> rx.Component:
@@ -74,6 +80,7 @@ def menu_page() -> rx.Component:
 
 
 app = rx.App(
+    api_transformer=api,
     theme=rx.theme(appearance="light"),
     head_components=[
         rx.el.link(rel="preconnect", href="https://fonts.googleapis.com"),
@@ -84,6 +91,14 @@ app = rx.App(
         ),
     ],
 )
+app.register_lifespan_task(provider_lifespan)
+app.register_lifespan_task(job_queue_lifespan)
+app.register_lifespan_task(retention_lifespan)
+app.register_lifespan_task(loop_lag_lifespan)
 app.add_page(index, route="/")
-app.add_page(menu_page, route="/menu/[menu_id]", on_load=MenuState.load_menu)
-app.add_page(upload_page, route="/upload")
\ No newline at end of file
+app.add_page(
+    menu_page,
+    route="/menu/[menu_id]",
+    on_load=[MenuState.load_menu, MenuPageState.open_tab_from_url],
+)
+app.add_page(upload_page, route="/upload", on_load=UploadState.resume_job)
\ No newline at end of file
@@ -39,11 +39,27 @@ def _response_view() -> rx.Component:
     """View to display the audio response from the assistant."""
     return rx.el.div(
         rx.el.h3("Here's my response:", class_name="text-xl font-bold text-gray-100"),
-        rx.el.audio(
-            src=rx.get_upload_url(CallState.audio_response_src),
-            controls=True,
-            autoplay=True,
-            class_name="w-full mt-4",
+        rx.cond(
+            CallState.audio_segments.length() > 0,
+            rx.cond(
+                CallState.current_segment != "",
+                rx.audio(
+                    src=rx.get_upload_url(CallState.current_segment),
+                    playing=True,
+                    controls=True,
+                    on_ended=CallState.next_segment,
+                    width="100%",
+                    height="54px",
+                    class_name="mt-4",
+                ),
+                None,
+            ),
+            rx.el.audio(
+                src=rx.get_upload_url(CallState.audio_response_src),
+                controls=True,
+                autoplay=True,
+                class_name="w-full mt-4",
+            ),
         ),
         rx.el.button(
             rx.icon("refresh-ccw", class_name="mr-2 h-4 w-4"),
@@ -73,6 +73,79 @@ def _menu_section(section: MenuSection) -> rx.Component:
     )
 
 
+def _allergen_filter_chip(allergen: str) -> rx.Component:
+    """A toggle that hides the items containing an allergen."""
+    return rx.el.button(
+        rx.cond(
+            MenuState.excluded_allergens.contains(allergen),
+            rx.icon("ban", class_name="h-3 w-3"),
+            None,
+        ),
+        allergen,
+        on_click=MenuState.toggle_allergen(allergen),
+        class_name=rx.cond(
+            MenuState.excluded_allergens.contains(allergen),
+            "flex items-center gap-1 bg-red-600 text-white text-xs font-medium px-2.5 py-1 rounded-full",
+            "flex items-center gap-1 bg-gray-700 text-gray-300 text-xs font-medium px-2.5 py-1 rounded-full hover:bg-gray-600",
+        ),
+    )
+
+
+def _menu_filters() -> rx.Component:
+    """Allergen, price and section filters for the menu."""
+    return rx.el.div(
+        rx.cond(
+            MenuState.allergen_options.length() > 0,
+            rx.el.div(
+                rx.el.p("Sin:", class_name="text-sm font-medium text-gray-400"),
+                rx.foreach(MenuState.allergen_options, _allergen_filter_chip),
+                class_name="flex flex-wrap items-center gap-2",
+            ),
+            None,
+        ),
+        rx.el.div(
+            rx.el.input(
+                type="number",
+                min=0,
+                step="0.5",
+                placeholder="Precio máx. €",
+                value=MenuState.max_price,
+                on_change=MenuState.set_max_price,
+                class_name="w-36 p-2 bg-gray-700 border border-gray-600 rounded-md text-sm text-gray-200",
+            ),
+            rx.el.select(
+                rx.el.option("Todas las secciones", value=""),
+                rx.foreach(
+                    MenuState.section_options,
+                    lambda title: rx.el.option(title, value=title),
+                ),
+                value=MenuState.section_filter,
+                on_change=MenuState.set_section_filter,
+                class_name="p-2 bg-gray-700 border border-gray-600 rounded-md text-sm text-gray-200",
+            ),
+            rx.cond(
+                MenuState.filters_active,
+                rx.el.button(
+                    "Quitar filtros",
+                    on_click=MenuState.clear_filters,
+                    class_name="text-sm text-red-500 hover:underline",
+                ),
+                None,
+            ),
+            class_name="flex flex-wrap items-center gap-3",
+        ),
+        class_name="flex flex-col gap-4 mb-8 p-4 bg-gray-900 border border-gray-700 rounded-lg",
+    )
+
+
+def _no_matches() -> rx.Component:
+    """Shown when the filters exclude every item."""
+    return rx.el.p(
+        "Ningún plato coincide con estos filtros.",
+        class_name="text-center text-gray-400 py-12",
+    )
+
+
 def _menu_not_found() -> rx.Component:
     """Component to display when a menu is not found."""
     return rx.el.div(
@@ -102,7 +175,12 @@ def menu_display() -> rx.Component:
         rx.cond(
             MenuState.menu_found,
             rx.el.div(
-                rx.foreach(MenuState.menu_data, _menu_section),
+                _menu_filters(),
+                rx.cond(
+                    MenuState.filtered_menu.length() > 0,
+                    rx.foreach(MenuState.filtered_menu, _menu_section),
+                    _no_matches(),
+                ),
                 class_name="w-full max-w-5xl mx-auto",
             ),
             _menu_not_found(),
@@ -28,6 +28,18 @@ def _upload_button() -> rx.Component:
     )
 
 
+def _job_progress() -> rx.Component:
+    """Progress of the background menu extraction."""
+    return rx.el.div(
+        rx.el.div(
+            class_name="h-2 bg-red-600 rounded-full transition-all duration-500",
+            style={"width": UploadState.job_progress.to_string() + "%"},
+        ),
+        rx.el.p(UploadState.job_message, class_name="text-xs text-gray-400 mt-2"),
+        class_name="w-full mt-4 bg-gray-800 rounded-full",
+    )
+
+
 def _qr_code_display() -> rx.Component:
     """Displays the generated QR code."""
     return rx.el.div(
@@ -40,12 +52,18 @@ def _qr_code_display() -> rx.Component:
             class_name="text-center text-gray-400 mt-2 mb-4",
         ),
         rx.image(
-            src=rx.get_upload_url(UploadState.qr_code_src),
+            src=UploadState.qr_code_src,
             alt="Menu QR Code",
             width=200,
             height=200,
             class_name="mx-auto border-4 border-gray-800 rounded-lg shadow-lg",
         ),
+        rx.el.a(
+            "Download for print (SVG)",
+            href=UploadState.qr_code_src + "?format=svg&size=1024",
+            target="_blank",
+            class_name="block mt-2 text-center text-sm text-gray-400 hover:text-gray-200 underline",
+        ),
         rx.el.input(
             default_value=UploadState.menu_url,
             read_only=True,
@@ -77,7 +95,7 @@ def upload_page() -> rx.Component:
                     "Upload Your Menu", class_name="text-2xl font-bold text-gray-100"
                 ),
                 rx.el.p(
-                    "Upload an image of your menu, and we'll digitize it for you.",
+                    "Upload photos of each page of your menu, or a PDF, and we'll digitize it for you.",
                     class_name="text-gray-400 mt-1",
                 ),
                 rx.upload.root(
@@ -91,16 +109,20 @@ def upload_page() -> rx.Component:
                             class_name="text-gray-400",
                         ),
                         rx.el.p(
-                            "PNG, JPG, or JPEG up to 10MB",
+                            "PNG, JPG, JPEG or PDF, up to 6 pages of 10MB each",
                             class_name="text-xs text-gray-500",
                         ),
                         class_name="flex flex-col items-center justify-center p-8 border-2 border-dashed border-gray-600 rounded-lg bg-gray-800 text-center",
                     ),
                     id=UPLOAD_ID,
-                    accept={"image/png": [".png"], "image/jpeg": [".jpg", ".jpeg"]},
-                    max_files=1,
+                    accept={
+                        "image/png": [".png"],
+                        "image/jpeg": [".jpg", ".jpeg"],
+                        "application/pdf": [".pdf"],
+                    },
+                    max_files=6,
                     max_size=10000000,
-                    multiple=False,
+                    multiple=True,
                     class_name="w-full mt-6 cursor-pointer",
                 ),
                 rx.el.div(
@@ -116,7 +138,18 @@ def upload_page() -> rx.Component:
                     ),
                     None,
                 ),
+                rx.el.label(
+                    rx.el.input(
+                        type="checkbox",
+                        checked=UploadState.force_reextract,
+                        on_change=UploadState.set_force_reextract,
+                        class_name="accent-red-600",
+                    ),
+                    "Re-extract even if this image was uploaded before",
+                    class_name="flex items-center gap-2 mt-4 text-sm text-gray-400",
+                ),
                 _upload_button(),
+                rx.cond(UploadState.processing, _job_progress(), None),
                 rx.el.a(
                     "< Back to Menu",
                     href="/menu/sample",
@@ -0,0 +1,134 @@
+import logging
+import threading
+
+from app.services.providers import get_provider
+from app.services.settings import (
+    CHAT_CONTEXT_TOKENS,
+    CHAT_KEEP_MESSAGES,
+    CHAT_STATS_LOG_EVERY,
+    CHAT_SUMMARY_BATCH,
+    CHAT_SUMMARY_MAX_WORDS,
+)
+
+# Rough per-message cost of role and separators in chat-completion formats.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_INSTRUCTIONS = f"""
+You keep the notes of a waiter talking to a customer at a restaurant table.
+Update the notes with the new part of the conversation. Keep what matters for
+the rest of the meal: what they ordered or liked, dislikes, allergies and
+dietary needs, budget, group size and open questions. Drop small talk.
+Answer with the notes only, in the customer's language, in at most
+{CHAT_SUMMARY_MAX_WORDS} words.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximates the token count of `text` (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(messages: list[dict[str, str]]) -> int:
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def summary_message(summary: str) -> list[dict[str, str]]:
+    if not summary:
+        return []
+    return [{"role": "system", "content": f"Earlier in this conversation:\n{summary}"}]
+
+
+def context_window(
+    messages: list[dict[str, str]], summary: str = "", budget: int = CHAT_CONTEXT_TOKENS
+) -> list[dict[str, str]]:
+    """Returns the history to send to the model: the running summary plus unsummarised turns.
+
+    The oldest turns are dropped until the history fits `budget` tokens; the
+    latest message is always sent.
+    """
+    prefix = summary_message(summary)
+    used = message_tokens(prefix)
+    kept = []
+    for message in reversed(messages):
+        cost = message_tokens([message])
+        if kept and used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    return prefix + kept[::-1]
+
+
+def fold_range(messages: list[dict[str, str]], folded: int) -> tuple[int, int] | None:
+    """Returns the slice of messages due to be folded into the summary, if any.
+
+    Messages are folded in batches of CHAT_SUMMARY_BATCH once more than
+    CHAT_KEEP_MESSAGES are waiting, so the summary is rewritten every few
+    turns rather than on every one.
+    """
+    end = len(messages) - CHAT_KEEP_MESSAGES
+    if end - folded < CHAT_SUMMARY_BATCH:
+        return None
+    return folded, end
+
+
+async def summarize(summary: str, messages: list[dict[str, str]]) -> str:
+    """Folds `messages` into the running `summary` with one model call."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = f"Notes so far:\n{summary or '(none)'}\n\nNew conversation:\n{transcript}"
+    return (
+        await get_provider().complete(
+            [
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS.strip()},
+                {"role": "user", "content": prompt},
+            ]
+        )
+    ).strip()
+
+
+class PromptTokenStats:
+    """Estimated prompt tokens sent per chat turn, to check they stay flat over a conversation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_turn: dict[int, list[int]] = {}
+        self.turns = 0
+        self.folds = 0
+
+    def record(self, turn: int, tokens: int):
+        with self._lock:
+            self.turns += 1
+            total = self._by_turn.setdefault(turn, [0, 0])
+            total[0] += 1
+            total[1] += tokens
+
+    def record_fold(self):
+        with self._lock:
+            self.folds += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_turn = {turn: total // count for turn, (count, total) in sorted(self._by_turn.items())}
+            return {
+                "turns": self.turns,
+                "folds": self.folds,
+                "mean_tokens": sum(t for _, t in self._by_turn.values()) // max(1, self.turns),
+                "max_turn_mean": max(by_turn.values(), default=0),
+                "by_turn": by_turn,
+            }
+
+
+prompt_token_stats = PromptTokenStats()
+
+
+def record_prompt_tokens(turn: int, messages: list[dict[str, str]]) -> int:
+    """Records the estimated size of a chat prompt, logging the per-turn means every so often."""
+    tokens = message_tokens(messages)
+    prompt_token_stats.record(turn, tokens)
+    stats = prompt_token_stats.stats()
+    if stats["turns"] % CHAT_STATS_LOG_EVERY == 0:
+        by_turn = " ".join(f"{t}:{n}" for t, n in stats["by_turn"].items())
+        logging.info(
+            f"Chat prompt tokens per turn (mean {stats['mean_tokens']}, "
+            f"{stats['folds']} summary folds): {by_turn}"
+        )
+    return tokens
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+import httpx
+from elevenlabs.client import AsyncElevenLabs
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.services.settings import (
+    HTTP_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+    TTS_MAX_CONCURRENCY,
+)
+
+# Shared by every session in the worker so connections (and their TLS
+# handshakes) are reused across requests instead of rebuilt per event.
+_openai: AsyncOpenAI | None = None
+_elevenlabs: AsyncElevenLabs | None = None
+_elevenlabs_http: httpx.AsyncClient | None = None
+
+llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+tts_slots = asyncio.Semaphore(TTS_MAX_CONCURRENCY)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_openai() -> AsyncOpenAI:
+    """Returns the pooled async OpenAI client."""
+    global _openai
+    if _openai is None:
+        _openai = AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(limits=_limits(), timeout=HTTP_TIMEOUT)
+        )
+    return _openai
+
+
+def get_elevenlabs() -> AsyncElevenLabs:
+    """Returns the pooled async ElevenLabs client."""
+    global _elevenlabs, _elevenlabs_http
+    if _elevenlabs is None:
+        _elevenlabs_http = httpx.AsyncClient(limits=_limits(), timeout=HTTP_TIMEOUT)
+        _elevenlabs = AsyncElevenLabs(
+            api_key=os.getenv("ELEVENLABS_API_KEY"), httpx_client=_elevenlabs_http
+        )
+    return _elevenlabs
+
+
+async def close_clients():
+    """Closes the pooled clients, e.g. when the worker shuts down."""
+    global _openai, _elevenlabs, _elevenlabs_http
+    if _openai is not None:
+        await _openai.close()
+        _openai = None
+    if _elevenlabs_http is not None:
+        await _elevenlabs_http.aclose()
+        _elevenlabs, _elevenlabs_http = None, None
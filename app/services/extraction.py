@@ -0,0 +1,159 @@
+import asyncio
+import base64
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from PIL import Image, UnidentifiedImageError
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.errors import PdfReadError
+
+from app.services.file_io import run_io
+from app.services.image_prep import prepare_image
+from app.services.jobs import PermanentJobError
+from app.services.metrics import span
+from app.services.providers import ModelProvider, get_provider
+from app.services.settings import EXTRACTION_MAX_PAGES, EXTRACTION_PAGE_WORKERS
+
+EXTRACTION_PROMPT = """
+
+        parse the pictures of the menu by splitting it into Sections with its name
+
+        each section has a list of items,
+        with name -> simply the name of the item on the menu
+        price -> the price of the food, it can be empty
+        ingredients -> a list of ingredients of the food, if not explecitly stated just empty
+        allergens -> if there is stated the allergens of a food add it
+
+
+
+        """
+
+
+def encode_image(image_path) -> tuple[str, str]:
+    """Returns the pre-processed menu image as base64 together with its MIME type."""
+    with span("image_prep"):
+        image_bytes, mime = prepare_image(image_path)
+    with span("base64_encode"):
+        return base64.b64encode(image_bytes).decode("utf-8"), mime
+
+
+def split_pdf(pdf_path: Path) -> list[bytes]:
+    """Splits a PDF into one single-page PDF document per page."""
+    with span("pdf_split"):
+        reader = PdfReader(str(pdf_path))
+        pages = []
+        for page in reader.pages:
+            writer = PdfWriter()
+            writer.add_page(page)
+            buffer = BytesIO()
+            writer.write(buffer)
+            pages.append(buffer.getvalue())
+    return pages
+
+
+def count_pages(file_path: Path) -> int:
+    """Returns how many menu pages an uploaded file holds, without encoding them.
+
+    Raises PermanentJobError for a file that is not a readable PDF or image.
+    """
+    file_path = Path(file_path)
+    try:
+        if file_path.suffix.lower() == ".pdf":
+            return len(PdfReader(str(file_path)).pages)
+        # Only reads the header.
+        with Image.open(file_path):
+            return 1
+    except (PdfReadError, UnidentifiedImageError) as e:
+        raise PermanentJobError(f"{file_path.name} is not a readable PDF or image: {e}") from e
+
+
+def page_urls(file_path: Path) -> list[str]:
+    """Returns one data URL per menu page contained in an uploaded file."""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() == ".pdf":
+        return [
+            f"data:application/pdf;base64,{base64.b64encode(page).decode('utf-8')}"
+            for page in split_pdf(file_path)
+        ]
+    encoded_image, mime = encode_image(file_path)
+    return [f"data:{mime};base64,{encoded_image}"]
+
+
+def _section_key(title: str) -> str:
+    return " ".join(title.split()).casefold()
+
+
+def _item_key(item: dict[str, Any]) -> tuple:
+    return (" ".join(str(item.get("name", "")).split()).casefold(), item.get("price"))
+
+
+def merge_sections(pages: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Merges per-page sections in page order.
+
+    Sections whose titles match (ignoring case and spacing) are folded into the
+    first one, e.g. a section continued on the next page, and items repeated
+    with the same name and price are kept once.
+    """
+    merged: dict[str, dict[str, Any]] = {}
+    seen_items: dict[str, set[tuple]] = {}
+    for sections in pages:
+        for section in sections:
+            key = _section_key(section.get("title", ""))
+            if key not in merged:
+                merged[key] = {"title": section.get("title", ""), "items": []}
+                seen_items[key] = set()
+            for item in section.get("items", []):
+                item_key = _item_key(item)
+                if item_key not in seen_items[key]:
+                    seen_items[key].add(item_key)
+                    merged[key]["items"].append(item)
+    return list(merged.values())
+
+
+async def extract_menu(
+    file_paths: list[Path],
+    provider: ModelProvider | None = None,
+    workers: int = EXTRACTION_PAGE_WORKERS,
+    on_page_done: Callable[[int, int], Awaitable[None]] | None = None,
+) -> dict[str, Any]:
+    """Extracts a menu from one or more images/PDFs, one model call per page.
+
+    Pages are extracted concurrently (at most `workers` at a time), so the
+    total latency tracks the slowest page rather than the sum of all pages.
+    `on_page_done(done, total)` is awaited as each page finishes. If a page
+    fails, the pages still in flight are cancelled and its error is raised.
+    """
+    provider = provider or get_provider()
+    page_count = sum([await run_io(count_pages, file_path) for file_path in file_paths])
+    if page_count > EXTRACTION_MAX_PAGES:
+        raise PermanentJobError(
+            f"Menu has {page_count} pages, more than the {EXTRACTION_MAX_PAGES} allowed"
+        )
+    urls: list[str] = []
+    for file_path in file_paths:
+        urls.extend(await run_io(page_urls, file_path))
+    slots = asyncio.Semaphore(max(1, workers))
+    done = 0
+
+    async def extract_page(url: str) -> list[dict[str, Any]]:
+        nonlocal done
+        async with slots:
+            with span("vision_call"):
+                result = await provider.extract_menu(EXTRACTION_PROMPT, url)
+        done += 1
+        if on_page_done is not None:
+            await on_page_done(done, len(urls))
+        return result["sections"]
+
+    tasks = [asyncio.create_task(extract_page(url)) for url in urls]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return {"sections": merge_sections([task.result() for task in tasks])}
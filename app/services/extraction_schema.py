@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class MenuItem(BaseModel):
+    name: str
+    price: float
+    ingredients: list[str]
+    allergens: list[str]
+
+
+class MenuSection(BaseModel):
+    title: str
+    items: list[MenuItem]
+
+
+class Menu(BaseModel):
+    sections: list[MenuSection]
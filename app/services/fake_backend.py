@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import random
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from app.services.providers import ModelProvider
+from app.services.settings import (
+    FAKE_AUDIO_PATH,
+    FAKE_CHUNK_DELAY_MS,
+    FAKE_CHUNK_SIZE,
+    FAKE_LATENCY_MS,
+    FAKE_RESPONSE_CHARS,
+)
+
+_FAKE_SECTIONS = {
+    "Tapas": ["Patatas Bravas", "Croquetas de Jamón", "Pan con Tomate", "Pimientos de Padrón"],
+    "Platos Principales": ["Paella Valenciana", "Pulpo a la Gallega", "Entrecot a la brasa"],
+    "Postres": ["Crema Catalana", "Tarta de Santiago", "Flan de Huevo Casero"],
+    "Bebidas": ["Estrella Damm", "Voll-Damm", "Copa de Sangría", "Agua Mineral"],
+}
+_FAKE_ALLERGENS = ["Gluten", "Lácteos", "Huevo", "Frutos de cáscara", "Sulfitos"]
+_FAKE_ANSWER = (
+    "Te recomiendo las croquetas de jamón con una Estrella Damm bien fría. "
+    "Si prefieres algo más ligero, el pulpo a la gallega es muy popular. "
+    "Para terminar, la crema catalana nunca falla. "
+)
+
+
+class FakeProvider(ModelProvider):
+    """Deterministic, offline stand-in for the model backends.
+
+    Every call sleeps for `latency_ms` before answering and streams in chunks
+    of `chunk_size` characters, `chunk_delay_ms` apart, so the pipelines can be
+    load-tested at high concurrency without a network.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LATENCY_MS,
+        chunk_size: int = FAKE_CHUNK_SIZE,
+        chunk_delay_ms: float = FAKE_CHUNK_DELAY_MS,
+        response_chars: int = FAKE_RESPONSE_CHARS,
+        audio_path: Path = FAKE_AUDIO_PATH,
+    ):
+        self.latency_ms = latency_ms
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_delay_ms = chunk_delay_ms
+        self.response_chars = response_chars
+        self.audio_path = audio_path
+        self._audio: bytes | None = None
+
+    async def _wait(self, ms: float):
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    def _answer(self, messages: list[dict[str, str]]) -> str:
+        question = messages[-1]["content"] if messages else ""
+        repeats = self.response_chars // len(_FAKE_ANSWER) + 1
+        answer = (_FAKE_ANSWER * repeats)[: self.response_chars]
+        return f"({question[:40]}) {answer}" if question else answer
+
+    async def extract_menu(self, prompt: str, image_url: str) -> dict[str, Any]:
+        await self._wait(self.latency_ms)
+        rng = random.Random(hashlib.sha256(image_url.encode()).hexdigest())
+        sections = []
+        for title, names in _FAKE_SECTIONS.items():
+            items = [
+                {
+                    "name": name,
+                    "price": round(rng.uniform(2.5, 25.0), 2),
+                    "ingredients": [],
+                    "allergens": rng.sample(_FAKE_ALLERGENS, rng.randint(0, 2)),
+                }
+                for name in names
+            ]
+            sections.append({"title": title, "items": items})
+        return {"sections": sections}
+
+    async def stream_chat(self, messages: list[dict[str, str]]) -> AsyncIterator[str]:
+        await self._wait(self.latency_ms)
+        answer = self._answer(messages)
+        for start in range(0, len(answer), self.chunk_size):
+            yield answer[start : start + self.chunk_size]
+            await self._wait(self.chunk_delay_ms)
+
+    async def complete(self, messages: list[dict[str, str]]) -> str:
+        await self._wait(self.latency_ms)
+        return self._answer(messages)
+
+    async def transcribe(self, audio_path: str) -> str:
+        await self._wait(self.latency_ms)
+        return "¿Qué cerveza me recomiendas para acompañar las tapas?"
+
+    async def synthesize(self, text: str) -> AsyncIterator[bytes]:
+        await self._wait(self.latency_ms)
+        if self._audio is None:
+            self._audio = self.audio_path.read_bytes()
+        chunk_bytes = 16 * 1024
+        for start in range(0, len(self._audio), chunk_bytes):
+            yield self._audio[start : start + chunk_bytes]
+            await self._wait(self.chunk_delay_ms)
+
+    def tts_profile(self) -> tuple[str, ...]:
+        return (self.name, self.audio_path.name)
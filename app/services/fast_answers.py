@@ -0,0 +1,536 @@
+"""Deterministic answers to factual menu questions, without a model call.
+
+Prices, ingredients, "does X contain Y", "what's gluten-free" and "what
+desserts do you have" are answered straight from the menu when the question
+and the item it names are matched with high confidence. Anything else,
+including every request for a recommendation or pairing and any other
+question about a named item, returns None and goes to the model as before.
+"""
+
+import difflib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.services.menu_cache import menu_cache
+from app.services.menu_index import MenuIndex, build_menu_index, normalize_term
+from app.services.menu_prompt import format_price
+from app.services.metrics import observe
+from app.services.settings import FAST_MATCH_CUTOFF, FAST_STATS_LOG_EVERY
+
+RECOMMEND = re.compile(
+    r"\b(recommend\w*|suggest\w*|best|favou?rite|should i|would you|pair\w*|goes well"
+    r"|go(es)? with|match\w* with|to have with"
+    r"|recomiend\w*|recomendar\w*|recomendacion\w*|sugier\w*|sugerencia\w*|mejor\w*"
+    r"|marid\w*|aconsej\w*|que me pido|que pido|van? (bien )?con|pega\w* con|acompan\w*)\b"
+)
+PRICE = re.compile(r"\b(how much|price\w*|cost\w*|precio\w*|cuanto|cuesta\w*|vale\w*)\b")
+INGREDIENTS = re.compile(
+    r"\b(ingredient\w*|what'?s in|what is in|made (of|with)|que lleva\w*|de que es|que tiene)\b"
+)
+CONTAINS = re.compile(r"\b(contain\w*|have|has|with|lleva\w*|contiene\w*|tiene\w*|con)\b")
+FREE_OF = re.compile(
+    r"\b(?:(\w+)[- ]free|sin (\w+)|without (\w+)"
+    r"|no (?:lleva\w*|contiene\w*|tiene\w*|contain\w*|have|has) (\w+)|no (\w+))\b"
+)
+LISTING = re.compile(
+    r"\b(what|which|do you have|list|any|que|cuales|teneis|tienen|tienes|hay)\b"
+)
+SPANISH = re.compile(
+    r"\b(cuanto|cuesta|precio|lleva|tiene|tienen|teneis|hay|que|cuales|sin|el|la|los|las)\b"
+)
+
+STOPWORDS = {
+    "the", "a", "an", "is", "are", "does", "do", "of", "in", "it", "you", "your",
+    "for", "and", "or", "to", "me", "my", "much", "how", "what", "which", "have",
+    "has", "with", "any", "some", "there", "el", "la", "los", "las", "un", "una",
+    "de", "del", "y", "o", "es", "son", "que", "me", "por", "para", "al", "lo",
+    "hay", "con", "sin", "free", "contain", "contains", "price", "cost", "costs",
+    "precio", "cuanto", "cuesta", "vale", "lleva", "tiene", "tienen", "teneis",
+    "list", "cuales", "ingredients", "ingredientes", "please", "porfa", "favor",
+}
+
+# Words that ask "anything on the menu", as in "¿hay algún plato con huevo?".
+ANY_ITEM = {
+    "algo", "alguno", "alguna", "algun", "plato", "platos", "cosa", "cosas", "opcion",
+    "opciones", "carta", "menu", "comida", "anything", "something", "dish", "dishes",
+    "item", "items", "option", "options", "food", "there", "llevan", "contienen",
+    "tienes", "without", "contiene",
+}
+
+# Words after which an ingredient is what is asked about ("anything with jamon"),
+# rather than part of the item's name ("is the jamon gluten free").
+ASKED_AFTER = {
+    "with", "without", "have", "has", "contain", "contains", "con", "sin", "lleva",
+    "llevan", "tiene", "tienen", "contiene", "contienen", "hay", "of", "de",
+}
+
+# Everyday words guests use for the allergens and categories menus list.
+ALLERGEN_SYNONYMS = {
+    "gluten": {"gluten", "wheat", "trigo"},
+    "lacteos": {"dairy", "milk", "lactose", "leche", "lactosa", "lacteos", "queso", "cheese"},
+    "dairy": {"dairy", "milk", "lactose", "leche", "lactosa", "lacteos", "cheese"},
+    "huevo": {"egg", "eggs", "huevo", "huevos"},
+    "egg": {"egg", "eggs", "huevo", "huevos"},
+    "frutos de cascara": {
+        "nut", "nuts", "almond", "almonds", "frutos", "almendra", "almendras", "nueces"
+    },
+    "nuts": {"nut", "nuts", "frutos", "nueces"},
+    "cacahuetes": {"peanut", "peanuts", "cacahuete", "cacahuetes", "mani"},
+    "pescado": {"fish", "pescado"},
+    "crustaceos": {
+        "shellfish", "crustacean", "crustaceans", "marisco", "crustaceos", "gambas", "prawns"
+    },
+    "moluscos": {"mollusc", "molluscs", "shellfish", "moluscos", "marisco"},
+    "soja": {"soy", "soya", "soja"},
+    "sulfitos": {"sulphites", "sulfites", "sulfitos"},
+    "apio": {"celery", "apio"},
+    "mostaza": {"mustard", "mostaza"},
+    "sesamo": {"sesame", "sesamo"},
+    "altramuces": {"lupin", "altramuces"},
+}
+CATEGORY_SYNONYMS = {
+    "beer": {"beer", "beers", "cerveza", "cervezas", "lager", "damm", "malta de cebada"},
+    "wine": {"wine", "wines", "vino", "vinos", "cava"},
+    "drink": {"drink", "drinks", "beverage", "beverages", "bebida", "bebidas"},
+    "dessert": {"dessert", "desserts", "postre", "postres", "sweet", "sweets"},
+    "starter": {
+        "starter", "starters", "entrante", "entrantes", "tapa", "tapas", "appetizer", "appetizers"
+    },
+    "main": {"main", "mains", "principal", "principales", "segundos"},
+    "salad": {"salad", "salads", "ensalada", "ensaladas"},
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", normalize_term(text))
+
+
+@dataclass(frozen=True)
+class MenuCatalog:
+    """Lookup tables over a menu version for matching questions to items."""
+
+    sections: list[dict[str, Any]]
+    index: MenuIndex
+    items: list[tuple[int, int]]
+    name_tokens: dict[str, set[int]]
+    vocabulary: list[str]
+    section_titles: list[str]
+    allergen_keys: dict[str, str] = field(default_factory=dict)
+    ingredient_vocabulary: frozenset[str] = frozenset()
+
+    def item(self, item_id: int) -> dict[str, Any]:
+        s, position = self.items[item_id]
+        return self.sections[s]["items"][position]
+
+
+def build_catalog(sections: list[dict[str, Any]]) -> MenuCatalog:
+    """Indexes item names, sections and allergens of a menu for fast answers."""
+    items = []
+    name_tokens: dict[str, set[int]] = {}
+    ingredient_vocabulary = set()
+    for s, section in enumerate(sections):
+        for position, item in enumerate(section.get("items", [])):
+            item_id = len(items)
+            items.append((s, position))
+            for token in _tokens(item.get("name", "")):
+                if token not in STOPWORDS and len(token) > 2:
+                    name_tokens.setdefault(token, set()).add(item_id)
+            for ingredient in item.get("ingredients") or []:
+                ingredient_vocabulary.update(
+                    t for t in _tokens(ingredient) if t not in STOPWORDS and len(t) > 2
+                )
+    index = build_menu_index(sections)
+    allergen_keys = {}
+    for label in index.allergens():
+        key = normalize_term(label)
+        for word in ALLERGEN_SYNONYMS.get(key, {key}) | {key}:
+            allergen_keys[word] = label
+    return MenuCatalog(
+        sections=sections,
+        index=index,
+        items=items,
+        name_tokens=name_tokens,
+        vocabulary=sorted(name_tokens),
+        section_titles=[normalize_term(section.get("title", "")) for section in sections],
+        allergen_keys=allergen_keys,
+        ingredient_vocabulary=frozenset(ingredient_vocabulary),
+    )
+
+
+def catalog_for(menu_id: str, sections: list[dict[str, Any]]) -> MenuCatalog:
+    """Returns the catalog of a stored menu (cached per version), else builds one."""
+    catalog = menu_cache.get_derived(menu_id, "fast_answers", build_catalog) if menu_id else None
+    return catalog or build_catalog(sections)
+
+
+def match_items(
+    catalog: MenuCatalog, query_tokens: list[str], by_coverage: bool = True
+) -> list[int]:
+    """Returns the items whose names best match the question, best first.
+
+    A query token counts when it equals, or is a close spelling of, a token of
+    an item name. Items are ranked by how many of their name tokens matched,
+    then (with `by_coverage`) preferring names that were matched completely.
+    """
+    scores: dict[int, float] = {}
+    for token in query_tokens:
+        if token in STOPWORDS or len(token) <= 2:
+            continue
+        candidates = [token] if token in catalog.name_tokens else difflib.get_close_matches(
+            token, catalog.vocabulary, n=2, cutoff=FAST_MATCH_CUTOFF
+        )
+        for candidate in candidates:
+            for item_id in catalog.name_tokens[candidate]:
+                scores[item_id] = scores.get(item_id, 0) + 1
+    if not scores:
+        return []
+
+    def rank(item_id: int) -> tuple[float, float]:
+        name_len = sum(
+            1 for t in _tokens(catalog.item(item_id)["name"]) if t in catalog.name_tokens
+        )
+        return scores[item_id], scores[item_id] / max(1, name_len) if by_coverage else 0
+
+    ranked = sorted(scores, key=rank, reverse=True)
+    best = rank(ranked[0])
+    return [item_id for item_id in ranked if rank(item_id) == best]
+
+
+def _allergen_in(catalog: MenuCatalog, text: str) -> tuple[str, str] | None:
+    """Returns the menu allergen a text mentions and the word it used for it."""
+    for word, label in catalog.allergen_keys.items():
+        if re.search(rf"\b{re.escape(word)}\b", text):
+            return label, word
+    return None
+
+
+def _allergen_words(label: str) -> set[str]:
+    key = normalize_term(label)
+    return ALLERGEN_SYNONYMS.get(key, {key}) | {key}
+
+
+def _has_allergen(item: dict[str, Any], label: str) -> bool:
+    """Whether an item lists the allergen, or an ingredient that is a word for it."""
+    if normalize_term(label) in {normalize_term(a) for a in item.get("allergens") or []}:
+        return True
+    ingredients = [normalize_term(i) for i in item.get("ingredients") or []]
+    return any(
+        re.search(rf"\b{re.escape(word)}\b", ingredient)
+        for word in _allergen_words(label)
+        for ingredient in ingredients
+    )
+
+
+def _has_data(item: dict[str, Any]) -> bool:
+    return bool(item.get("allergens") or item.get("ingredients"))
+
+
+def _price_text(item: dict[str, Any]) -> str:
+    price = format_price(item.get("price"))
+    return f"€{price}" if price else ""
+
+
+def describe_item(item: dict[str, Any], spanish: bool = True) -> str:
+    """One-sentence description of an item: name, price, ingredients and allergens."""
+    parts = [item.get("name", "").strip()]
+    price = _price_text(item)
+    if price:
+        parts[0] += f" ({price})"
+    ingredients = ", ".join(item.get("ingredients") or [])
+    allergens = ", ".join(item.get("allergens") or [])
+    if ingredients:
+        parts.append(("lleva " if spanish else "made with ") + ingredients)
+    if allergens:
+        parts.append(("alérgenos: " if spanish else "allergens: ") + allergens)
+    return ", ".join(parts) + "."
+
+
+def spoken_text(reply: str) -> str:
+    """Turns a markdown fast answer into plain text for speech."""
+    lines = [line.lstrip("- ").strip() for line in reply.replace("**", "").splitlines()]
+    lines = [line for line in lines if line]
+    if len(lines) > 1 and lines[0].endswith(":"):
+        return f"{lines[0]} {', '.join(lines[1:])}".rstrip(".") + "."
+    return " ".join(lines)
+
+
+def _answer_price(catalog: MenuCatalog, matches: list[int], es: bool) -> str | None:
+    if not matches or len(matches) > 3:
+        return None
+    lines = []
+    for item_id in matches:
+        item = catalog.item(item_id)
+        price = _price_text(item)
+        if not price:
+            return None
+        lines.append(f"**{item['name']}**: {price}")
+    if len(lines) == 1:
+        return f"{lines[0]}."
+    intro = "Tenemos varias opciones:" if es else "We have a few of those:"
+    return "\n".join([intro] + [f"- {line}" for line in lines])
+
+
+def _answer_ingredients(catalog: MenuCatalog, matches: list[int], es: bool) -> str | None:
+    if len(matches) != 1:
+        return None
+    item = catalog.item(matches[0])
+    if not item.get("ingredients"):
+        return None
+    return describe_item(item, es)
+
+
+def _yes(name: str, what: str, es: bool) -> str:
+    return f"Sí, **{name}** lleva {what}." if es else f"Yes, **{name}** contains {what}."
+
+
+def _allergen_note(es: bool) -> str:
+    return (
+        "Según los alérgenos e ingredientes indicados en la carta; "
+        "si es una alergia, confírmalo con el personal."
+        if es
+        else "Based on the allergens and ingredients listed on the menu; "
+        "if it's an allergy, please check with the staff."
+    )
+
+
+def _answer_allergen(
+    catalog: MenuCatalog, allergen: str, matches: list[int], free_of: bool, es: bool
+) -> str | None:
+    """Answers whether the named items, or which items, contain (or are free of) an allergen.
+
+    Always decided from the allergen lists and ingredients of every item, never
+    from item names, so "anything with egg" is not answered by "Egg Flan" alone.
+    A name that fits a few items ("the jamon") is answered for each of them.
+    """
+    if len(matches) > 3:
+        return None
+    if len(matches) > 1:
+        lines = []
+        for item_id in matches:
+            item = catalog.item(item_id)
+            if _has_allergen(item, allergen):
+                verdict = f"lleva {allergen}" if es else f"contains {allergen}"
+            elif _has_data(item):
+                verdict = f"la carta no indica {allergen}" if es else f"no {allergen} listed"
+            else:
+                return None
+            lines.append(f"- **{item['name']}**: {verdict}")
+        return "\n".join(lines + [_allergen_note(es)])
+    if matches:
+        item = catalog.item(matches[0])
+        name = item["name"]
+        if _has_allergen(item, allergen):
+            if free_of:
+                return f"No, **{name}** lleva {allergen}." if es else f"No, **{name}** contains {allergen}."
+            return _yes(name, allergen, es)
+        if not _has_data(item):
+            return None
+        if es:
+            return (
+                f"La carta no indica {allergen} en **{name}**, "
+                "pero confírmalo con el personal si es una alergia."
+            )
+        return (
+            f"The menu doesn't list {allergen} for **{name}**, "
+            "but please check with the staff if it's an allergy."
+        )
+    items = [catalog.item(item_id) for item_id in range(len(catalog.items))]
+    if free_of:
+        names = [i["name"] for i in items if _has_data(i) and not _has_allergen(i, allergen)]
+        if not names:
+            return None
+        intro = f"Sin {allergen} tenemos:" if es else f"Without {allergen} we have:"
+    else:
+        names = [i["name"] for i in items if _has_allergen(i, allergen)]
+        if not names:
+            return None
+        intro = f"Llevan {allergen}:" if es else f"These contain {allergen}:"
+    return "\n".join([intro] + [f"- {name}" for name in names] + [_allergen_note(es)])
+
+
+def _answer_ingredient(
+    catalog: MenuCatalog, matches: list[int], terms: list[str], es: bool
+) -> str | None:
+    """Answers "does X have Y" / "anything with Y" for ingredients that are not allergens."""
+    if len(matches) > 1:
+        return None
+    candidates = matches or range(len(catalog.items))
+    found = []
+    for item_id in candidates:
+        item = catalog.item(item_id)
+        for ingredient in item.get("ingredients") or []:
+            key = normalize_term(ingredient)
+            if any(re.search(rf"\b{re.escape(term)}", key) for term in terms):
+                found.append((item["name"], ingredient))
+                break
+    if not found:
+        return None
+    if matches:
+        return _yes(*found[0], es)
+    intro = "Lo llevan:" if es else "These have it:"
+    return "\n".join([intro] + [f"- {name} ({ingredient})" for name, ingredient in found])
+
+
+def _item_text(item: dict[str, Any]) -> str:
+    return normalize_term(" ".join([item.get("name", ""), *(item.get("ingredients") or [])]))
+
+
+def _answer_listing(catalog: MenuCatalog, query_tokens: list[str], es: bool) -> str | None:
+    words = set(query_tokens) | {w.rstrip("s") for w in query_tokens}
+    for section_id, title in enumerate(catalog.section_titles):
+        title_words = set(_tokens(title)) - STOPWORDS
+        if title_words and title_words <= words:
+            section = catalog.sections[section_id]
+            return _list_items(section["title"], section["items"], es)
+    for synonyms in CATEGORY_SYNONYMS.values():
+        if not words & synonyms:
+            continue
+        # A section named for the category, else the items that mention it.
+        for section_id, title in enumerate(catalog.section_titles):
+            if set(_tokens(title)) & synonyms:
+                section = catalog.sections[section_id]
+                return _list_items(section["title"], section["items"], es)
+        found = [
+            catalog.item(item_id)
+            for item_id in range(len(catalog.items))
+            if any(
+                re.search(rf"\b{re.escape(word)}\b", _item_text(catalog.item(item_id)))
+                for word in synonyms
+            )
+        ]
+        return _list_items(None, found, es)
+    return None
+
+
+def _list_items(title: str | None, items: list[dict[str, Any]], es: bool) -> str | None:
+    if not items:
+        return None
+    if title:
+        intro = f"En **{title}** tenemos:" if es else f"In **{title}** we have:"
+    else:
+        intro = "Tenemos:" if es else "We have:"
+    lines = []
+    for item in items:
+        price = _price_text(item)
+        lines.append(f"- {item['name']}" + (f" ({price})" if price else ""))
+    return "\n".join([intro] + lines)
+
+
+def answer(catalog: MenuCatalog, question: str) -> str | None:
+    """Answers a factual question from the menu, or returns None to ask the model."""
+    text = normalize_term(question)
+    if not text or RECOMMEND.search(text):
+        return None
+    query_tokens = _tokens(text)
+    es = bool(SPANISH.search(text))
+    matches = match_items(catalog, query_tokens)
+    if PRICE.search(text):
+        return _answer_price(catalog, matches, es)
+    found = _allergen_in(catalog, text)
+    if INGREDIENTS.search(text) and found is None:
+        return _answer_ingredients(catalog, matches, es)
+    # Words naming what is asked about must not pick the item ("Flan de Huevo" for
+    # "egg"), but an ingredient word elsewhere may be the item's name ("the jamon").
+    asked = set(_tokens(found[1])) if found else set()
+    terms = [
+        t
+        for i, t in enumerate(query_tokens)
+        if t in catalog.ingredient_vocabulary
+        and t not in asked
+        and i > 0
+        and query_tokens[i - 1] in ASKED_AFTER
+    ]
+    asked.update(terms)
+    rest = [t for t in query_tokens if t not in asked]
+    # Without the coverage tie-break, so an ambiguous name keeps every item it fits.
+    named = match_items(catalog, rest, by_coverage=False)
+    # About something that is neither an item nor the whole menu ("¿la cerveza tiene gluten?").
+    unclear = not named and any(
+        t not in STOPWORDS and t not in ANY_ITEM and len(t) > 2 for t in rest
+    )
+    if found is not None:
+        allergen = found[0]
+        free = FREE_OF.search(text)
+        free_of = free is not None and any(g and _allergen_in(catalog, g) for g in free.groups())
+        if unclear:
+            return None
+        if free_of or CONTAINS.search(text) or LISTING.search(text):
+            return _answer_allergen(catalog, allergen, named, free_of, es)
+        return None
+    if FREE_OF.search(text):
+        return None
+    if terms and CONTAINS.search(text):
+        if unclear:
+            return None
+        return _answer_ingredient(catalog, named, terms, es)
+    if matches:
+        # Names an item, so a catalog list would not answer it.
+        return None
+    if LISTING.search(text):
+        return _answer_listing(catalog, query_tokens, es)
+    return None
+
+
+class FastPathStats:
+    """Counts fast-path hits and estimates the model latency they saved.
+
+    The saving of a hit is the running mean of full model turns minus the time
+    the fast answer took.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.hits = 0
+        self.fast_seconds = 0.0
+        self.model_turns = 0
+        self.model_seconds = 0.0
+
+    def record(self, hit: bool, seconds: float):
+        with self._lock:
+            self.queries += 1
+            if hit:
+                self.hits += 1
+                self.fast_seconds += seconds
+
+    def record_model_turn(self, seconds: float):
+        with self._lock:
+            self.model_turns += 1
+            self.model_seconds += seconds
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            model_mean = self.model_seconds / self.model_turns if self.model_turns else 0.0
+            return {
+                "queries": self.queries,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.queries if self.queries else 0.0,
+                "fast_ms_mean": 1000 * self.fast_seconds / self.hits if self.hits else 0.0,
+                "model_ms_mean": 1000 * model_mean,
+                "latency_saved_s": max(0.0, self.hits * model_mean - self.fast_seconds),
+            }
+
+
+fast_path_stats = FastPathStats()
+
+
+def fast_answer(menu_id: str, sections: list[dict[str, Any]], question: str) -> str | None:
+    """Tries to answer a question locally, recording the outcome in `fast_path_stats`."""
+    started = time.perf_counter()
+    result = answer(catalog_for(menu_id, sections), question)
+    elapsed = time.perf_counter() - started
+    fast_path_stats.record(result is not None, elapsed)
+    observe("chat_fast_answer", elapsed)
+    stats = fast_path_stats.stats()
+    if stats["queries"] % FAST_STATS_LOG_EVERY == 0:
+        logging.info(
+            f"Chat fast path: {stats['hits']}/{stats['queries']} answered locally "
+            f"({stats['hit_rate']:.0%}), {stats['fast_ms_mean']:.2f} ms each vs "
+            f"{stats['model_ms_mean']:.0f} ms per model turn, "
+            f"{stats['latency_saved_s']:.1f} s saved"
+        )
+    return result
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Callable, TypeVar
+
+from app.services.metrics import span
+from app.services.settings import IO_WORKERS, UPLOAD_CHUNK_SIZE
+
+T = TypeVar("T")
+
+# Blocking disk work (uploads, QR encoding, base64, audio writes) runs here so
+# a large file never stalls the event loop that serves every other session.
+_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="file-io")
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs a blocking function on the bounded file I/O pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+def _copy_and_hash(src: BinaryIO, dest: Path, chunk_size: int) -> str:
+    digest = hashlib.sha256()
+    src.seek(0)
+    with dest.open("wb") as f:
+        while chunk := src.read(chunk_size):
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+async def save_upload(
+    uploaded_file, dest: Path, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> str:
+    """Copies an uploaded file to `dest` in chunks, returning its SHA-256 hex digest."""
+    with span("upload_write"):
+        return await run_io(_copy_and_hash, uploaded_file.file, dest, chunk_size)
+
+
+def write_bytes_atomic(path: Path, data: bytes):
+    """Writes `data` to a temporary file and renames it over `path`."""
+    # A unique temp name per writer, so concurrent saves of one path can't interleave.
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_json_atomic(path: Path, data: Any, indent: int | None = 4):
+    """Serialises `data` as JSON and atomically replaces `path` with it."""
+    write_bytes_atomic(path, json.dumps(data, indent=indent).encode("utf-8"))
+
+
+async def write_stream(path: Path, chunks: AsyncIterator[bytes]) -> int:
+    """Collects streamed chunks and writes them to `path` off the event loop."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+    await run_io(path.write_bytes, bytes(buffer))
+    return len(buffer)
@@ -0,0 +1,60 @@
+import mimetypes
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from app.services.settings import (
+    IMAGE_PREP_ENABLED,
+    IMAGE_PREP_GRAYSCALE,
+    IMAGE_PREP_MAX_SIDE,
+    IMAGE_PREP_QUALITY,
+    IMAGE_PREP_SHORT_SIDE,
+)
+
+
+def guess_mime(path: Path) -> str:
+    """Returns the image MIME type implied by the file extension."""
+    return mimetypes.guess_type(str(path))[0] or "image/jpeg"
+
+
+def target_size(width: int, height: int) -> tuple[int, int]:
+    """Returns the size the vision model actually looks at for a `width` x `height` image.
+
+    High-detail vision inputs are scaled to fit IMAGE_PREP_MAX_SIDE square and
+    then down so the short side is IMAGE_PREP_SHORT_SIDE; anything larger is
+    uploaded only to be thrown away. Images are never upscaled.
+    """
+    scale = min(
+        1.0,
+        IMAGE_PREP_MAX_SIDE / max(width, height),
+        IMAGE_PREP_SHORT_SIDE / min(width, height),
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_image(path: Path) -> tuple[bytes, str]:
+    """Returns the bytes and MIME type to send to the vision model for a menu photo.
+
+    Applies EXIF rotation, downscales to the model's working resolution,
+    optionally converts to grayscale, stretches contrast and re-encodes as JPEG.
+    """
+    path = Path(path)
+    if not IMAGE_PREP_ENABLED:
+        return path.read_bytes(), guess_mime(path)
+    raw = path.read_bytes()
+    with Image.open(BytesIO(raw)) as img:
+        rotated = img.getexif().get(0x0112, 1) != 1
+        img = ImageOps.exif_transpose(img)
+        size = target_size(*img.size)
+        resized = size != img.size
+        if resized:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        img = img.convert("L" if IMAGE_PREP_GRAYSCALE else "RGB")
+        img = ImageOps.autocontrast(img, cutoff=1)
+        buffer = BytesIO()
+        img.save(buffer, format="JPEG", quality=IMAGE_PREP_QUALITY, optimize=True)
+    prepared = buffer.getvalue()
+    if len(prepared) >= len(raw) and not (rotated or resized):
+        return raw, guess_mime(path)
+    return prepared, "image/jpeg"
@@ -0,0 +1,317 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from app.services.file_io import run_io
+from app.services.metrics import observe
+from app.services.settings import (
+    EXTRACTION_CONCURRENCY,
+    JOB_BACKOFF_SECONDS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOBS_DB_PATH,
+)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_until REAL,
+    run_after REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (kind, key);
+"""
+
+# Added after the first release; ALTERed into older databases.
+_LEASE_COLUMNS = {"owner": "TEXT", "lease_until": "REAL"}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job cannot succeed."""
+
+
+class Job(dict):
+    """A job row; `payload` and `result` are decoded from JSON."""
+
+    @property
+    def id(self) -> str:
+        return self["id"]
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        return self["payload"]
+
+
+Handler = Callable[[Job, "JobQueue"], Awaitable[dict[str, Any]]]
+
+
+class JobQueue:
+    """Durable SQLite-backed job queue worked by a fixed pool of asyncio workers.
+
+    Jobs survive restarts. A running job is leased to the process that claimed
+    it, which renews the lease every `heartbeat_seconds`; it is re-queued when
+    the lease runs out (its worker died) or when the same process restarts,
+    but never while another live worker still holds it. Failed attempts are retried with exponential backoff
+    up to `max_attempts`, and submitting a job with the `key` of a queued or
+    running job returns that job instead of running the work twice.
+    """
+
+    def __init__(
+        self,
+        path: Path = JOBS_DB_PATH,
+        concurrency: int = EXTRACTION_CONCURRENCY,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        backoff_seconds: float = JOB_BACKOFF_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        heartbeat_seconds: float = JOB_HEARTBEAT_SECONDS,
+    ):
+        self.path = path
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        # Unique among live workers. A restarted process reclaims its old jobs at
+        # once only if it gets the same pid (e.g. PID 1 in a container); any
+        # other dead worker's jobs wait for their lease to run out.
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: dict[str, Handler] = {}
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._wakeup: asyncio.Event | None = None
+        self._workers: list[asyncio.Task] = []
+        self._heartbeat: asyncio.Task | None = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in _LEASE_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn = conn
+        return self._conn
+
+    def _row_to_job(self, row: sqlite3.Row | None) -> Job | None:
+        if row is None:
+            return None
+        job = Job(dict(row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def register(self, kind: str, handler: Handler):
+        """Registers the coroutine that runs jobs of `kind`."""
+        self.handlers[kind] = handler
+
+    def submit(self, kind: str, payload: dict[str, Any], key: str | None = None) -> str:
+        """Queues a job and returns its id, or the id of a pending job with the same key."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            if key is not None:
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND key = ? AND status IN (?, ?)"
+                    " ORDER BY created_at DESC LIMIT 1",
+                    (kind, key, QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    return row["id"]
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, kind, key, payload, status, run_after, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, key, json.dumps(payload), QUEUED, now, now, now),
+            )
+        return job_id
+
+    async def enqueue(self, kind: str, payload: dict[str, Any], key: str | None = None) -> str:
+        """Submits a job from the event loop and wakes an idle worker."""
+        job_id = await run_io(self.submit, kind, payload, key)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Job | None:
+        """Returns the current state of a job, or None if it does not exist."""
+        with self._lock:
+            row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def set_progress(self, job_id: str, progress: int, message: str = ""):
+        """Records how far a running job has got (0-100) and what it is doing."""
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET progress = ?, message = ?, updated_at = ? WHERE id = ?",
+                (progress, message, time.time(), job_id),
+            )
+
+    def active_payloads(self) -> list[dict[str, Any]]:
+        """Returns the payloads of every queued or running job."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT payload FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def _claim(self) -> Job | None:
+        now = time.time()
+        with self._lock:
+            row = self._db().execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?,"
+                " lease_until = ?, updated_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = ? AND run_after <= ?"
+                " ORDER BY run_after LIMIT 1) RETURNING *",
+                (RUNNING, self.owner, now + self.lease_seconds, now, QUEUED, now),
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def _finish(self, job_id: str, result: dict[str, Any]):
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET status = ?, progress = 100, result = ?, error = NULL,"
+                " owner = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+                (DONE, json.dumps(result), time.time(), job_id, self.owner),
+            )
+
+    def _fail(self, job: Job, error: str, permanent: bool):
+        now = time.time()
+        retry = not permanent and job["attempts"] < self.max_attempts
+        status = QUEUED if retry else FAILED
+        run_after = now + self.backoff_seconds * 2 ** (job["attempts"] - 1) if retry else now
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ?, owner = NULL,"
+                " updated_at = ? WHERE id = ? AND owner = ?",
+                (status, error, run_after, now, job.id, self.owner),
+            )
+
+    def _requeue_interrupted(self, restarting: bool = False):
+        """Re-queues running jobs whose lease expired, plus (on start) those this process held before a restart."""
+        now = time.time()
+        owner = self.owner if restarting else None
+        with self._lock:
+            rows = self._db().execute(
+                "UPDATE jobs SET status = ?, owner = NULL, run_after = ?"
+                " WHERE status = ? AND (lease_until IS NULL OR lease_until < ? OR owner = ?)"
+                " RETURNING id",
+                (QUEUED, now, RUNNING, now, owner),
+            ).fetchall()
+        for row in rows:
+            logging.warning(f"Re-queued interrupted job {row['id']}")
+        return len(rows)
+
+    def _renew_leases(self):
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET lease_until = ? WHERE status = ? AND owner = ?",
+                (time.time() + self.lease_seconds, RUNNING, self.owner),
+            )
+
+    def _next_run_after(self) -> float | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT MIN(run_after) AS run_after FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()
+        return row["run_after"]
+
+    async def _run(self, job: Job):
+        handler = self.handlers.get(job["kind"])
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise PermanentJobError(f"No handler for job kind '{job['kind']}'")
+            result = await handler(job, self)
+            observe(f"job_{job['kind']}", time.perf_counter() - started)
+            await run_io(self._finish, job.id, result)
+        except Exception as e:
+            permanent = isinstance(e, PermanentJobError)
+            logging.exception(
+                f"Job {job.id} ({job['kind']}) attempt {job['attempts']} failed: {e}"
+            )
+            await run_io(self._fail, job, str(e), permanent)
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            job = await run_io(self._claim)
+            if job is not None:
+                await self._run(job)
+                continue
+            next_run = await run_io(self._next_run_after)
+            timeout = None if next_run is None else max(0.05, next_run - time.time())
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+
+    async def _keep_leases(self):
+        # Also picks up jobs left behind by workers in other processes that died.
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await run_io(self._renew_leases)
+                if await run_io(self._requeue_interrupted):
+                    self._wakeup.set()
+            except sqlite3.Error as e:
+                logging.exception(f"Job lease renewal failed: {e}")
+
+    async def start(self):
+        """Starts the worker pool on the running event loop (once)."""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        await run_io(self._requeue_interrupted, True)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(max(1, self.concurrency))
+        ]
+        self._heartbeat = asyncio.create_task(self._keep_leases(), name="job-leases")
+
+    async def stop(self):
+        """Cancels the workers; their unfinished jobs are re-queued on the next start."""
+        tasks = [*self._workers, *([self._heartbeat] if self._heartbeat else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+
+
+job_queue = JobQueue()
+
+
+@contextlib.asynccontextmanager
+async def job_queue_lifespan():
+    """App lifespan task that runs the job workers for the life of the backend."""
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
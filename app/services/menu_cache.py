@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.services.menu_repository import menu_repository
+from app.services.menu_snapshot import snapshot_source
+from app.services.settings import MENU_CACHE_REVALIDATE_SECONDS, MENU_CACHE_SIZE, MENU_SNAPSHOTS
+
+
+@dataclass(frozen=True)
+class MenuEntry:
+    """A parsed menu together with the source version it was read from."""
+
+    menu_id: str
+    version: tuple
+    data: list[dict[str, Any]]
+    derived: dict[str, Any] = field(default_factory=dict, compare=False)
+
+    def derive(self, name: str, build: Callable[[list[dict[str, Any]]], Any]) -> Any:
+        """Returns `build(data)`, computed once and kept with this entry."""
+        if name not in self.derived:
+            self.derived[name] = build(self.data)
+        return self.derived[name]
+
+
+class MenuCache:
+    """Process-wide LRU of parsed menus, invalidated when the source changes.
+
+    Entries are shared between every session in the worker, so callers must
+    treat the returned data as read-only. An entry's version is only checked
+    against the source once it is `revalidate_seconds` old, so most hits
+    never touch the database.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        maxsize: int = MENU_CACHE_SIZE,
+        revalidate_seconds: float = MENU_CACHE_REVALIDATE_SECONDS,
+    ):
+        self.source = source or (snapshot_source if MENU_SNAPSHOTS else menu_repository)
+        self.maxsize = maxsize
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: OrderedDict[str, MenuEntry] = OrderedDict()
+        self._checked: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get_entry(self, menu_id: str) -> MenuEntry | None:
+        """Returns the cached entry for a menu, reloading it if the source changed."""
+        if not menu_id or "/" in menu_id or "\\" in menu_id:
+            return None
+        checked_at = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(menu_id)
+            if entry is not None and checked_at - self._checked[menu_id] < self.revalidate_seconds:
+                self._entries.move_to_end(menu_id)
+                self.hits += 1
+                return entry
+        version = self.source.version(menu_id)
+        with self._lock:
+            entry = self._entries.get(menu_id)
+            if entry is not None and version is not None and entry.version == version:
+                self._entries.move_to_end(menu_id)
+                self._checked[menu_id] = checked_at
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if entry is not None:
+                self.invalidations += 1
+                del self._entries[menu_id]
+                del self._checked[menu_id]
+        if version is None:
+            return None
+        data = self.source.load(menu_id, version)
+        entry = MenuEntry(menu_id=menu_id, version=version, data=data)
+        with self._lock:
+            self._entries[menu_id] = entry
+            self._entries.move_to_end(menu_id)
+            self._checked[menu_id] = checked_at
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._checked[evicted]
+                self.evictions += 1
+        return entry
+
+    def get(self, menu_id: str) -> list[dict[str, Any]] | None:
+        """Returns the parsed sections of a menu, or None if it does not exist."""
+        entry = self.get_entry(menu_id)
+        return entry.data if entry is not None else None
+
+    def get_derived(
+        self, menu_id: str, name: str, build: Callable[[list[dict[str, Any]]], Any]
+    ) -> Any:
+        """Returns `build(menu data)`, computed once per menu version and cached with it."""
+        entry = self.get_entry(menu_id)
+        return entry.derive(name, build) if entry is not None else None
+
+    def invalidate(self, menu_id: str | None = None):
+        """Drops one menu, or every menu, from the cache."""
+        with self._lock:
+            if menu_id is None:
+                self._entries.clear()
+                self._checked.clear()
+            else:
+                self._entries.pop(menu_id, None)
+                self._checked.pop(menu_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Returns the hit/miss counters and current size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+menu_cache = MenuCache()
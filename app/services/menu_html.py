@@ -0,0 +1,141 @@
+"""Static, precompressed HTML pages for menus.
+
+A guest who scans a QR code only needs to read the menu, so `/m/<menu_id>`
+serves this page instead of booting the Reflex app: no websocket, no
+`on_load` event and no per-client state. It has the same cards as the
+`menu_display` component, and the allergen chips work with a few lines of
+inline script. The Chat and Call tabs link into the Reflex page, which only
+loads when a guest opens them.
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from html import escape
+from typing import Any
+from urllib.parse import quote
+
+from app.services.menu_cache import menu_cache
+from app.services.menu_index import build_menu_index, normalize_term
+from app.services.metrics import span
+
+_STYLE = """
+*{box-sizing:border-box}body{margin:0;background:#000;color:#d1d5db;font-family:Roboto,system-ui,sans-serif}
+header{background:#111827;border-bottom:1px solid #374151;padding:1rem;display:flex;justify-content:center}
+nav{display:flex;gap:.5rem;padding:.25rem;background:#1f2937;border-radius:.5rem}
+nav a{padding:.5rem 1rem;font-size:.875rem;font-weight:600;color:#d1d5db;border-radius:.375rem;text-decoration:none}
+nav a.on{background:#dc2626;color:#fff}nav a:hover:not(.on){background:#374151}
+main{max-width:64rem;margin:0 auto;padding:1rem 2rem}
+.filters{display:flex;flex-wrap:wrap;align-items:center;gap:.5rem;margin-bottom:2rem;padding:1rem;background:#111827;border:1px solid #374151;border-radius:.5rem}
+.filters p{margin:0;font-size:.875rem;color:#9ca3af}
+.chip{border:0;cursor:pointer;background:#374151;color:#d1d5db;font-size:.75rem;font-weight:500;padding:.25rem .625rem;border-radius:9999px}
+.chip.on{background:#dc2626;color:#fff}
+h2{font-size:1.5rem;color:#f3f4f6;margin:0 0 1.5rem;padding-bottom:.5rem;border-bottom:2px solid #dc2626}
+section{margin-bottom:3rem}.grid{display:grid;gap:1.5rem}
+@media(min-width:768px){.grid{grid-template-columns:1fr 1fr}}
+.card{background:#1f2937;padding:1rem;border-radius:.5rem;border:1px solid #374151}
+.card:hover{border-color:#ef4444}
+.row{display:flex;justify-content:space-between;align-items:center;margin-bottom:.75rem}
+.name{font-weight:600;font-size:1.125rem;color:#f3f4f6;margin:0}.price{font-weight:700;font-size:1.125rem;color:#ef4444;margin:0}
+.label{font-size:.875rem;font-weight:500;color:#9ca3af;margin:0 0 .5rem}
+.tags{display:flex;flex-wrap:wrap;gap:.5rem;margin-bottom:1rem}.card>div:last-child .tags{margin:0}
+.tag{background:#374151;font-size:.75rem;padding:.25rem .5rem;border-radius:.375rem}
+.badge{background:#7f1d1d;color:#fca5a5;font-size:.75rem;padding:.125rem .625rem;border-radius:9999px}
+.hidden{display:none}.empty{text-align:center;color:#9ca3af;padding:3rem 0}
+"""
+
+_SCRIPT = """
+const off=new Set();
+document.querySelectorAll('.chip').forEach(c=>c.onclick=()=>{
+const a=c.dataset.allergen;off.has(a)?off.delete(a):off.add(a);c.classList.toggle('on');
+let shown=0;document.querySelectorAll('section').forEach(s=>{let n=0;
+s.querySelectorAll('.card').forEach(i=>{const hide=(i.dataset.allergens||'').split('|').some(x=>off.has(x));
+i.classList.toggle('hidden',hide);if(!hide)n++});s.classList.toggle('hidden',!n);shown+=n});
+document.querySelector('.empty').classList.toggle('hidden',shown>0)});
+"""
+
+
+def _price(value: Any) -> str:
+    try:
+        return f"€{float(value):.2f}"
+    except (TypeError, ValueError):
+        return ""
+
+
+def _tags(label: str, values: list[str], css: str) -> str:
+    if not values:
+        return ""
+    tags = "".join(f'<span class="{css}">{escape(str(v))}</span>' for v in values)
+    return (
+        f'<div><p class="label">{label}</p>'
+        f'<div class="tags">{tags}</div></div>'
+    )
+
+
+def _item_card(item: dict[str, Any]) -> str:
+    allergens = item.get("allergens") or []
+    keys = "|".join(normalize_term(a) for a in allergens)
+    return (
+        f'<article class="card" data-allergens="{escape(keys)}">'
+        f'<div class="row"><p class="name">{escape(str(item.get("name", "")))}</p>'
+        f'<p class="price">{_price(item.get("price"))}</p></div>'
+        f"{_tags('Ingredientes:', item.get('ingredients') or [], 'tag')}"
+        f"{_tags('Alérgenos:', allergens, 'badge')}"
+        "</article>"
+    )
+
+
+def render_menu_html(menu_id: str, sections: list[dict[str, Any]], app_url: str = "") -> str:
+    """Renders a menu as a standalone HTML page, linking its Chat and Call tabs into `app_url`."""
+    page_url = f"{app_url.rstrip('/')}/menu/{quote(menu_id)}"
+    chips = "".join(
+        f'<button class="chip" data-allergen="{escape(normalize_term(a))}">{escape(a)}</button>'
+        for a in build_menu_index(sections).allergens()
+    )
+    filters = f'<div class="filters"><p>Sin:</p>{chips}</div>' if chips else ""
+    body = "".join(
+        f'<section><h2>{escape(str(s.get("title", "")))}</h2><div class="grid">'
+        f'{"".join(_item_card(item) for item in s.get("items", []))}</div></section>'
+        for s in sections
+    )
+    return (
+        '<!doctype html><html lang="es"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width,initial-scale=1">'
+        f"<title>Menú</title><style>{_STYLE}</style></head><body>"
+        f'<header><nav><a class="on" href="">Menu</a><a href="{page_url}?tab=chat">Chat</a>'
+        f'<a href="{page_url}?tab=call">Call</a></nav></header>'
+        f"<main>{filters}{body}"
+        '<p class="empty hidden">Ningún plato coincide con estos filtros.</p></main>'
+        f"<script>{_SCRIPT}</script></body></html>"
+    )
+
+
+@dataclass(frozen=True)
+class StaticMenuPage:
+    html: bytes
+    gzip: bytes
+    tag: str
+
+    @property
+    def etag(self) -> str:
+        # Weak, because the gzip and identity bodies share it.
+        return f'W/"{self.tag}"'
+
+
+def build_static_page(menu_id: str, sections: list[dict[str, Any]], app_url: str) -> StaticMenuPage:
+    with span("menu_page_render"):
+        html = render_menu_html(menu_id, sections, app_url).encode()
+    return StaticMenuPage(
+        html=html,
+        gzip=gzip.compress(html, compresslevel=9, mtime=0),
+        tag=hashlib.blake2b(html, digest_size=12).hexdigest(),
+    )
+
+
+def static_menu_page(menu_id: str, app_url: str) -> StaticMenuPage | None:
+    """Returns a stored menu's page, rendered and compressed once per menu version."""
+    return menu_cache.get_derived(
+        menu_id,
+        f"static_page:{app_url}",
+        lambda sections: build_static_page(menu_id, sections, app_url),
+    )
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import math
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.menu_cache import menu_cache
+from app.services.settings import FILTER_PRICE_BUCKET, FILTER_SECTION_CACHE_SIZE
+
+
+def normalize_term(term: str) -> str:
+    """Folds case, accents and spacing so "Lácteos" and "lacteos " match."""
+    decomposed = unicodedata.normalize("NFKD", str(term))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split()).casefold()
+
+
+def parse_price(value: Any) -> float | None:
+    """Reads a price, accepting a decimal comma; None for blanks, text, nan and inf."""
+    try:
+        price = float(value.replace(",", ".") if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        return None
+    return price if math.isfinite(price) else None
+
+
+@dataclass(frozen=True)
+class SectionIndex:
+    """Inverted index over the items of one section, by item position."""
+
+    title: str
+    size: int
+    allergens: dict[str, frozenset[int]]
+    ingredients: dict[str, frozenset[int]]
+    price_buckets: dict[int, frozenset[int]]
+    prices: tuple[float | None, ...]
+    labels: dict[str, str]
+
+    def matching(
+        self, excluded: frozenset[str], max_price: float | None, bucket_width: float
+    ) -> list[int]:
+        """Returns the positions of items passing the filters, in menu order.
+
+        Items without a price are kept under a price limit: the menu doesn't
+        say they cost more, and hiding them would hide "market price" dishes.
+        """
+        keep = set(range(self.size))
+        for allergen in excluded:
+            keep -= self.allergens.get(allergen, frozenset())
+        if max_price is not None and math.isfinite(max_price):
+            limit = math.floor(max_price / bucket_width)
+            affordable = {i for i, price in enumerate(self.prices) if price is None}
+            for bucket, positions in self.price_buckets.items():
+                if bucket < limit:
+                    affordable |= positions
+                elif bucket == limit:
+                    affordable |= {i for i in positions if self.prices[i] <= max_price}
+            keep &= affordable
+        return sorted(keep)
+
+
+def build_section_index(
+    section: dict[str, Any], bucket_width: float = FILTER_PRICE_BUCKET
+) -> SectionIndex:
+    allergens: dict[str, set[int]] = {}
+    ingredients: dict[str, set[int]] = {}
+    buckets: dict[int, set[int]] = {}
+    prices = []
+    labels: dict[str, str] = {}
+    for position, item in enumerate(section.get("items", [])):
+        for allergen in item.get("allergens") or []:
+            key = normalize_term(allergen)
+            allergens.setdefault(key, set()).add(position)
+            labels.setdefault(key, str(allergen).strip())
+        for ingredient in item.get("ingredients") or []:
+            ingredients.setdefault(normalize_term(ingredient), set()).add(position)
+        price = parse_price(item.get("price"))
+        prices.append(price)
+        if price is not None:
+            buckets.setdefault(math.floor(price / bucket_width), set()).add(position)
+    return SectionIndex(
+        title=section.get("title", ""),
+        size=len(prices),
+        allergens={k: frozenset(v) for k, v in allergens.items()},
+        ingredients={k: frozenset(v) for k, v in ingredients.items()},
+        price_buckets={k: frozenset(v) for k, v in buckets.items()},
+        prices=tuple(prices),
+        labels=labels,
+    )
+
+
+@dataclass(frozen=True)
+class MenuIndex:
+    """Per-section inverted indexes of a menu version, plus its display labels."""
+
+    sections: tuple[SectionIndex, ...]
+    bucket_width: float
+
+    def allergens(self) -> list[str]:
+        """Returns the allergens present on the menu, as first written on it."""
+        labels: dict[str, str] = {}
+        for section in self.sections:
+            for key, label in section.labels.items():
+                labels.setdefault(key, label)
+        return sorted(labels.values(), key=normalize_term)
+
+    def items_with_ingredient(self, ingredient: str) -> list[tuple[int, int]]:
+        """Returns (section, position) of every item listing an ingredient."""
+        key = normalize_term(ingredient)
+        return [
+            (s, position)
+            for s, section in enumerate(self.sections)
+            for position in sorted(section.ingredients.get(key, ()))
+        ]
+
+    def filter(
+        self,
+        sections: list[dict[str, Any]],
+        exclude_allergens: list[str] = (),
+        max_price: float | None = None,
+        section: str = "",
+    ) -> list[dict[str, Any]]:
+        """Returns the menu restricted to matching items, dropping emptied sections."""
+        excluded = frozenset(normalize_term(a) for a in exclude_allergens)
+        wanted = normalize_term(section) if section else ""
+        result = []
+        for s, index in enumerate(self.sections):
+            if wanted and normalize_term(index.title) != wanted:
+                continue
+            positions = index.matching(excluded, max_price, self.bucket_width)
+            if positions:
+                items = sections[s]["items"]
+                result.append({"title": index.title, "items": [items[i] for i in positions]})
+        return result
+
+
+class SectionIndexCache:
+    """LRU of section indexes keyed by section content.
+
+    Editing a menu creates a new version, but sections whose content did not
+    change hash the same and reuse their index, so only edited sections are
+    re-indexed.
+    """
+
+    def __init__(self, maxsize: int = FILTER_SECTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, SectionIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    def get(self, section: dict[str, Any], bucket_width: float) -> SectionIndex:
+        key = hashlib.blake2b(
+            json.dumps([bucket_width, section], sort_keys=True).encode(), digest_size=16
+        ).digest()
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.reused += 1
+                return index
+        index = build_section_index(section, bucket_width)
+        with self._lock:
+            self.built += 1
+            self._entries[key] = index
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return index
+
+
+section_indexes = SectionIndexCache()
+
+
+def build_menu_index(
+    sections: list[dict[str, Any]], bucket_width: float = FILTER_PRICE_BUCKET
+) -> MenuIndex:
+    """Indexes a menu, reusing the indexes of sections seen unchanged before."""
+    return MenuIndex(
+        sections=tuple(section_indexes.get(section, bucket_width) for section in sections),
+        bucket_width=bucket_width,
+    )
+
+
+def menu_index(menu_id: str) -> MenuIndex | None:
+    """Returns the filter index of a stored menu, built once per menu version."""
+    return menu_cache.get_derived(menu_id, "filter_index", build_menu_index)
+
+
+def filter_menu(
+    menu_id: str,
+    exclude_allergens: list[str] = (),
+    max_price: float | None = None,
+    section: str = "",
+) -> list[dict[str, Any]] | None:
+    """Filters a stored menu through its index, or returns None if it does not exist."""
+    entry = menu_cache.get_entry(menu_id)
+    if entry is None:
+        return None
+    index = entry.derive("filter_index", build_menu_index)
+    return index.filter(entry.data, exclude_allergens, max_price, section)
@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import Any
+
+from app.services.extraction import extract_menu
+from app.services.fast_answers import describe_item
+from app.services.file_io import run_io
+from app.services.jobs import Job, JobQueue, PermanentJobError, job_queue
+from app.services.menu_cache import menu_cache
+from app.services.menu_store import save_menu
+from app.services.metrics import span
+from app.services.providers import get_provider
+from app.services.qr import menu_url
+from app.services.settings import (
+    TTS_WARMUP_CONCURRENCY,
+    TTS_WARMUP_ENABLED,
+    TTS_WARMUP_MAX_ITEMS,
+)
+from app.services.tts_cache import tts_cache
+from app.services.upload_index import upload_index
+from app.services.voice_pipeline import CALL_GREETING
+
+EXTRACT_MENU = "extract_menu"
+WARM_TTS = "warm_tts"
+
+
+def extraction_payload(
+    file_paths: list[Path], digest: str, menu_id: str, base_url: str, upload_dir: Path
+) -> dict[str, Any]:
+    """Builds the payload of an extraction job.
+
+    The menu id is fixed at submit time so a retried attempt overwrites the
+    same menu instead of creating a second one.
+    """
+    return {
+        "files": [str(path) for path in file_paths],
+        "digest": digest,
+        "menu_id": menu_id,
+        "menu_url": menu_url(base_url, menu_id),
+        "upload_dir": str(upload_dir),
+    }
+
+
+async def run_extract_menu(job: Job, queue: JobQueue) -> dict[str, Any]:
+    """Extracts, stores and publishes a menu from uploaded files."""
+    payload = job.payload
+    file_paths = [Path(path) for path in payload["files"]]
+    menu_id = payload["menu_id"]
+    await run_io(queue.set_progress, job.id, 5, "Preparing pages")
+
+    async def on_page_done(done: int, total: int):
+        await run_io(
+            queue.set_progress,
+            job.id,
+            10 + 75 * done // total,
+            f"Read page {done} of {total}",
+        )
+
+    processed_data = await extract_menu(file_paths, on_page_done=on_page_done)
+    await run_io(queue.set_progress, job.id, 90, "Saving menu")
+    source_files = ",".join(path.name for path in file_paths)
+    with span("menu_save"):
+        await run_io(save_menu, menu_id, processed_data["sections"], source_files)
+    await run_io(upload_index.record, payload["digest"], menu_id, source_files)
+    if TTS_WARMUP_ENABLED:
+        await queue.enqueue(
+            WARM_TTS, {"menu_id": menu_id, "upload_dir": payload["upload_dir"]}, key=menu_id
+        )
+    return {"menu_id": menu_id, "menu_url": payload["menu_url"]}
+
+
+def warmup_phrases(sections: list[dict[str, Any]]) -> list[str]:
+    """The call greeting plus a spoken description of each item, in menu order."""
+    items = [item for section in sections for item in section.get("items", [])]
+    return [CALL_GREETING] + [describe_item(item) for item in items[:TTS_WARMUP_MAX_ITEMS]]
+
+
+async def run_warm_tts(job: Job, queue: JobQueue) -> dict[str, Any]:
+    """Pre-renders the phrases the call tab is likely to speak for a new menu."""
+    sections = await run_io(menu_cache.get, job.payload["menu_id"])
+    if sections is None:
+        raise PermanentJobError(f"Menu '{job.payload['menu_id']}' no longer exists")
+    phrases = warmup_phrases(sections)
+    await run_io(queue.set_progress, job.id, 5, f"Rendering {len(phrases)} phrases")
+    synthesised = await tts_cache.warm(
+        get_provider(), phrases, Path(job.payload["upload_dir"]), TTS_WARMUP_CONCURRENCY
+    )
+    return {"phrases": len(phrases), "synthesised": synthesised}
+
+
+job_queue.register(EXTRACT_MENU, run_extract_menu)
+job_queue.register(WARM_TTS, run_warm_tts)
@@ -0,0 +1,51 @@
+from typing import Any
+
+from app.services.menu_cache import menu_cache
+
+MENU_HEADER = "MENU (one item per line: name | price in EUR | ingredients | allergens)"
+
+
+def format_price(price: Any) -> str:
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return ""
+    return f"{price:.2f}".rstrip("0").rstrip(".") if price else ""
+
+
+def compact_menu(sections: list[dict[str, Any]]) -> str:
+    """Serialises menu sections into a compact, line-per-item form for prompts.
+
+    Empty prices, ingredient lists and allergen lists are dropped entirely, so
+    OCR'd menus without details cost little more than their item names.
+    """
+    lines = [MENU_HEADER]
+    for section in sections:
+        lines.append(f"## {section.get('title', '').strip()}")
+        for item in section.get("items", []):
+            fields = [str(item.get("name", "")).strip()]
+            price = format_price(item.get("price"))
+            ingredients = ", ".join(item.get("ingredients") or [])
+            allergens = ", ".join(item.get("allergens") or [])
+            if price or ingredients or allergens:
+                fields.append(price)
+            if ingredients or allergens:
+                fields.append(ingredients)
+            if allergens:
+                fields.append(allergens)
+            lines.append(" | ".join(fields))
+    return "\n".join(lines)
+
+
+def menu_prompt(menu_id: str) -> str | None:
+    """Returns the compact prompt form of a menu, built once per menu version."""
+    return menu_cache.get_derived(menu_id, "prompt", compact_menu)
+
+
+def build_system_prompt(instructions: str, menu_text: str) -> str:
+    """Lays out a system prompt as static instructions followed by the menu.
+
+    Both parts are identical across turns and tables for the same menu, so the
+    prompt is a stable prefix that provider-side prompt caching can reuse.
+    """
+    return f"{instructions.strip()}\n\n{menu_text}"
@@ -0,0 +1,250 @@
+"""SQLite store for menus, their sections and items.
+
+Import the legacy `menus/*.json` files with:
+
+    python -m app.services.menu_repository migrate
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.services.settings import MENU_DB_PATH, MENUS_DIR
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS menus (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 1,
+    source TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    menu_id TEXT NOT NULL REFERENCES menus (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    PRIMARY KEY (menu_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS items (
+    menu_id TEXT NOT NULL,
+    section INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    price REAL,
+    ingredients TEXT NOT NULL DEFAULT '[]',
+    allergens TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (menu_id, section, position),
+    FOREIGN KEY (menu_id, section) REFERENCES sections (menu_id, position) ON DELETE CASCADE
+) WITHOUT ROWID;
+"""
+
+
+def _item_from_row(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "name": row["name"],
+        "price": row["price"],
+        "ingredients": json.loads(row["ingredients"]),
+        "allergens": json.loads(row["allergens"]),
+    }
+
+
+class MenuRepository:
+    """Menus stored in SQLite (WAL), one row per menu, section and item.
+
+    Each thread gets its own long-lived connection, so reads from the file I/O
+    pool never contend on a shared handle. Every write bumps the menu's
+    `version`, which `MenuCache` uses to notice changes.
+    """
+
+    def __init__(self, path: Path = MENU_DB_PATH, legacy_dir: Path | None = MENUS_DIR):
+        self.path = path
+        self.legacy_dir = legacy_dir
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialised = False
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with self._init_lock:
+                if not self._initialised:
+                    conn.executescript(_SCHEMA)
+                    self._initialised = True
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, menu_id: str, sections: list[dict[str, Any]], source: str = "") -> int:
+        """Atomically replaces a menu's contents, returning its new version."""
+        now = time.time()
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            version = db.execute(
+                "INSERT INTO menus (id, source, created_at, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (id) DO UPDATE SET version = version + 1,"
+                " source = excluded.source, updated_at = excluded.updated_at"
+                " RETURNING version",
+                (menu_id, source, now, now),
+            ).fetchone()["version"]
+            db.execute("DELETE FROM sections WHERE menu_id = ?", (menu_id,))
+            db.executemany(
+                "INSERT INTO sections (menu_id, position, title) VALUES (?, ?, ?)",
+                [(menu_id, i, section.get("title", "")) for i, section in enumerate(sections)],
+            )
+            db.executemany(
+                "INSERT INTO items (menu_id, section, position, name, price, ingredients, allergens)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        menu_id,
+                        i,
+                        j,
+                        item.get("name", ""),
+                        item.get("price"),
+                        json.dumps(item.get("ingredients") or []),
+                        json.dumps(item.get("allergens") or []),
+                    )
+                    for i, section in enumerate(sections)
+                    for j, item in enumerate(section.get("items", []))
+                ],
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return version
+
+    def delete(self, menu_id: str) -> bool:
+        """Deletes a menu with its sections and items."""
+        cursor = self._db().execute("DELETE FROM menus WHERE id = ?", (menu_id,))
+        return cursor.rowcount > 0
+
+    def version(self, menu_id: str) -> tuple | None:
+        """Returns the current version of a menu, or None if it does not exist.
+
+        A menu still only present as a legacy JSON file is imported on first use.
+        """
+        row = self._db().execute(
+            "SELECT version, updated_at FROM menus WHERE id = ?", (menu_id,)
+        ).fetchone()
+        if row is None and self._import_legacy(menu_id):
+            return self.version(menu_id)
+        return (row["version"], row["updated_at"]) if row is not None else None
+
+    def get_menu(self, menu_id: str) -> tuple[tuple, list[dict[str, Any]]] | None:
+        """Returns a menu's version and sections read in one transaction, or None."""
+        db = self._db()
+        db.execute("BEGIN")
+        try:
+            row = db.execute(
+                "SELECT version, updated_at FROM menus WHERE id = ?", (menu_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            sections = [
+                {"title": title["title"], "items": []}
+                for title in db.execute(
+                    "SELECT title FROM sections WHERE menu_id = ? ORDER BY position", (menu_id,)
+                )
+            ]
+            for item in db.execute(
+                "SELECT * FROM items WHERE menu_id = ? ORDER BY section, position", (menu_id,)
+            ):
+                sections[item["section"]]["items"].append(_item_from_row(item))
+        finally:
+            db.execute("COMMIT")
+        return (row["version"], row["updated_at"]), sections
+
+    def get_sections(self, menu_id: str) -> list[dict[str, Any]] | None:
+        """Returns a menu as a list of sections, or None if it does not exist."""
+        menu = self.get_menu(menu_id)
+        return menu[1] if menu is not None else None
+
+    def get_item(self, menu_id: str, section: int, position: int) -> dict[str, Any] | None:
+        """Returns a single item without loading the rest of the menu."""
+        row = self._db().execute(
+            "SELECT * FROM items WHERE menu_id = ? AND section = ? AND position = ?",
+            (menu_id, section, position),
+        ).fetchone()
+        return _item_from_row(row) if row is not None else None
+
+    def exists(self, menu_id: str) -> bool:
+        row = self._db().execute("SELECT 1 FROM menus WHERE id = ?", (menu_id,)).fetchone()
+        return row is not None
+
+    def list_menus(self) -> list[dict[str, Any]]:
+        """Returns id, version, timestamps and item count of every menu, newest first."""
+        rows = self._db().execute(
+            "SELECT menus.*, (SELECT COUNT(*) FROM items WHERE items.menu_id = menus.id) AS item_count"
+            " FROM menus ORDER BY updated_at DESC"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load(self, menu_id: str, version: tuple | None = None) -> list[dict[str, Any]]:
+        """`MenuCache` source hook: returns a menu's sections or raises FileNotFoundError."""
+        sections = self.get_sections(menu_id)
+        if sections is None:
+            raise FileNotFoundError(f"No menu '{menu_id}'")
+        return sections
+
+    def _import_legacy(self, menu_id: str) -> bool:
+        if self.legacy_dir is None:
+            return False
+        path = self.legacy_dir / f"{menu_id}.json"
+        try:
+            sections = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except json.JSONDecodeError as e:
+            logging.exception(f"Legacy menu file {path} is not valid JSON: {e}")
+            return False
+        self.upsert(menu_id, sections, source=path.name)
+        return True
+
+    def import_json_dir(self, menus_dir: Path, overwrite: bool = False) -> tuple[int, int]:
+        """Imports every `<id>.json` menu in a directory, returning (imported, skipped)."""
+        imported = skipped = 0
+        for path in sorted(Path(menus_dir).glob("*.json")):
+            if not overwrite and self.exists(path.stem):
+                skipped += 1
+                continue
+            try:
+                sections = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError as e:
+                logging.error(f"Skipping {path}: {e}")
+                skipped += 1
+                continue
+            self.upsert(path.stem, sections, source=path.name)
+            imported += 1
+        return imported, skipped
+
+
+menu_repository = MenuRepository()
+
+
+def main(args):
+    if args.command == "migrate":
+        imported, skipped = menu_repository.import_json_dir(Path(args.menus_dir), args.overwrite)
+        print(f"imported {imported} menus into {menu_repository.path}, skipped {skipped}")
+    elif args.command == "list":
+        for menu in menu_repository.list_menus():
+            print(f"{menu['id']:<14} v{menu['version']:<4} {menu['item_count']:>4} items  {menu['source']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["migrate", "list"])
+    parser.add_argument("--menus-dir", default=str(MENUS_DIR))
+    parser.add_argument("--overwrite", action="store_true", help="re-import menus already in the store")
+    main(parser.parse_args())
@@ -0,0 +1,163 @@
+"""Precompiled binary menu snapshots, memory-mapped at load time.
+
+A snapshot is a small header followed by the menu sections serialised with
+`marshal`. Every string is interned before dumping, so repeated allergens,
+ingredients and dict keys are written once and come back as shared objects.
+The header carries the source version, and a snapshot whose version no
+longer matches the menu store is rebuilt on the next load.
+
+    python -m app.services.menu_snapshot compile
+"""
+
+import argparse
+import hashlib
+import logging
+import marshal
+import mmap
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Any
+
+from app.services.file_io import write_bytes_atomic
+from app.services.menu_repository import MenuRepository, menu_repository
+from app.services.settings import SNAPSHOT_DIR
+
+MAGIC = b"MNSP"
+FORMAT_VERSION = 1
+MARSHAL_VERSION = 4
+# magic, format version, marshal version, source version token, payload crc32, payload length
+_HEADER = struct.Struct("<4sHH8sII")
+
+
+def version_token(version: tuple) -> bytes:
+    """Folds a source version tuple into the fixed-size token stored in the header."""
+    return hashlib.blake2b(repr(version).encode(), digest_size=8).digest()
+
+
+def _intern(value: Any) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    if isinstance(value, dict):
+        return {sys.intern(k): _intern(v) for k, v in value.items()}
+    return value
+
+
+def dump_snapshot(sections: list[dict[str, Any]], version: tuple) -> bytes:
+    """Serialises menu sections into snapshot bytes for the given source version."""
+    payload = marshal.dumps(_intern(sections), MARSHAL_VERSION)
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        MARSHAL_VERSION,
+        version_token(version),
+        zlib.crc32(payload),
+        len(payload),
+    )
+    return header + payload
+
+
+def read_snapshot(path: Path, version: tuple) -> list[dict[str, Any]] | None:
+    """Loads a snapshot, or returns None if it is missing, stale or corrupt."""
+    try:
+        with open(path, "rb", buffering=0) as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            if len(mm) < _HEADER.size:
+                return None
+            magic, fmt, marshal_version, token, crc, length = _HEADER.unpack_from(mm)
+            if (
+                magic != MAGIC
+                or fmt != FORMAT_VERSION
+                or marshal_version != MARSHAL_VERSION
+                or token != version_token(version)
+                or len(mm) != _HEADER.size + length
+            ):
+                return None
+            # Checked and unmarshalled straight from the mapping, without a copy.
+            with memoryview(mm)[_HEADER.size :] as payload:
+                if zlib.crc32(payload) != crc:
+                    return None
+                return marshal.loads(payload)
+    except (FileNotFoundError, ValueError, EOFError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logging.exception(f"Snapshot {path} is unreadable, rebuilding: {e}")
+        return None
+
+
+class SnapshotMenuSource:
+    """`MenuCache` source that serves menus from binary snapshots of the store.
+
+    Versions come from the repository (one primary-key lookup, which `MenuCache`
+    has already done and passes to `load`); the sections come from the snapshot
+    file when it matches that version and are rebuilt from the repository
+    otherwise.
+    """
+
+    def __init__(
+        self, repository: MenuRepository = menu_repository, snapshot_dir: Path = SNAPSHOT_DIR
+    ):
+        self.repository = repository
+        self.snapshot_dir = snapshot_dir
+        self.rebuilds = 0
+
+    def path(self, menu_id: str) -> Path:
+        return self.snapshot_dir / f"{menu_id}.snap"
+
+    def version(self, menu_id: str) -> tuple | None:
+        return self.repository.version(menu_id)
+
+    def _write(self, menu_id: str, version: tuple, sections: list[dict[str, Any]]):
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.path(menu_id), dump_snapshot(sections, version))
+
+    def compile(self, menu_id: str) -> tuple | None:
+        """Writes the snapshot of a menu's current version, returning that version."""
+        menu = self.repository.get_menu(menu_id)
+        if menu is None:
+            return None
+        self._write(menu_id, *menu)
+        return menu[0]
+
+    def load(self, menu_id: str, version: tuple | None = None) -> list[dict[str, Any]]:
+        """Returns a menu's sections, rebuilding its snapshot if it is stale."""
+        version = version or self.repository.version(menu_id)
+        if version is None:
+            raise FileNotFoundError(f"No menu '{menu_id}'")
+        sections = read_snapshot(self.path(menu_id), version)
+        if sections is not None:
+            return sections
+        self.rebuilds += 1
+        menu = self.repository.get_menu(menu_id)
+        if menu is None:
+            raise FileNotFoundError(f"No menu '{menu_id}'")
+        self._write(menu_id, *menu)
+        return menu[1]
+
+    def forget(self, menu_id: str):
+        """Deletes a menu's snapshot file."""
+        self.path(menu_id).unlink(missing_ok=True)
+
+
+snapshot_source = SnapshotMenuSource()
+
+
+def main(args):
+    menu_ids = args.menu_ids or [menu["id"] for menu in menu_repository.list_menus()]
+    for menu_id in menu_ids:
+        version = snapshot_source.compile(menu_id)
+        if version is None:
+            print(f"{menu_id}: not found")
+            continue
+        size = snapshot_source.path(menu_id).stat().st_size
+        print(f"{menu_id}: v{version[0]} -> {snapshot_source.path(menu_id)} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["compile"])
+    parser.add_argument("menu_ids", nargs="*", help="menus to compile (default: all)")
+    main(parser.parse_args())
@@ -0,0 +1,34 @@
+import logging
+import uuid
+from typing import Any, Callable
+
+from app.services.menu_cache import menu_cache
+from app.services.menu_index import menu_index
+from app.services.menu_repository import menu_repository
+from app.services.menu_snapshot import snapshot_source
+from app.services.settings import MENU_SNAPSHOTS
+
+_save_hooks: list[Callable[[str], Any]] = []
+
+
+def new_menu_id() -> str:
+    return str(uuid.uuid4())[:8]
+
+
+def on_menu_saved(hook: Callable[[str], Any]):
+    """Registers a callback run with the menu id after every save, e.g. to pre-render it."""
+    _save_hooks.append(hook)
+
+
+def save_menu(menu_id: str, sections: list[dict[str, Any]], source: str = ""):
+    """Stores a menu atomically, refreshes its snapshot and cached copy, and indexes it."""
+    menu_repository.upsert(menu_id, sections, source)
+    if MENU_SNAPSHOTS:
+        snapshot_source.compile(menu_id)
+    menu_cache.invalidate(menu_id)
+    menu_index(menu_id)
+    for hook in _save_hooks:
+        try:
+            hook(menu_id)
+        except Exception as e:
+            logging.exception(f"Post-save hook {hook.__name__} failed for menu '{menu_id}': {e}")
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from app.services.clients import (
+    close_clients,
+    get_elevenlabs,
+    get_openai,
+    llm_slots,
+    tts_slots,
+)
+from app.services.extraction_schema import Menu
+from app.services.providers import ModelProvider
+from app.services.settings import (
+    CALL_MODEL,
+    CHAT_MODEL,
+    TRANSCRIBE_MODEL,
+    TTS_MODEL_ID,
+    TTS_OUTPUT_FORMAT,
+    TTS_VOICE_ID,
+    VISION_MODEL,
+)
+
+
+def _prompt_cache_key(messages: list[dict[str, str]]) -> str:
+    """Routes requests sharing a system prompt (i.e. the same menu) to the same prompt cache."""
+    system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    return hashlib.sha256(system.encode()).hexdigest()[:32]
+
+
+class OpenAIProvider(ModelProvider):
+    """OpenAI for vision, chat and transcription; ElevenLabs for speech.
+
+    All calls are awaited on pooled async clients and bounded by the
+    LLM/TTS concurrency slots, so a slow stream never blocks the event loop.
+    """
+
+    name = "openai"
+
+    async def extract_menu(self, prompt: str, image_url: str) -> dict[str, Any]:
+        if image_url.startswith("data:application/pdf"):
+            page = {"type": "input_file", "filename": "menu.pdf", "file_data": image_url}
+        else:
+            page = {"type": "input_image", "image_url": image_url}
+        async with llm_slots:
+            response = await get_openai().responses.parse(
+                model=VISION_MODEL,
+                input=[
+                    {"role": "system", "content": prompt},
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "input_text", "text": "parse the menu"},
+                            page,
+                        ],
+                    },
+                ],
+                text_format=Menu,
+            )
+        return response.output_parsed.dict()
+
+    async def stream_chat(self, messages: list[dict[str, str]]) -> AsyncIterator[str]:
+        async with llm_slots:
+            stream = await get_openai().chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                stream=True,
+                prompt_cache_key=_prompt_cache_key(messages),
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+    async def complete(self, messages: list[dict[str, str]]) -> str:
+        async with llm_slots:
+            response = await get_openai().responses.create(
+                model=CALL_MODEL,
+                input=messages,
+                prompt_cache_key=_prompt_cache_key(messages),
+            )
+        return response.output_text
+
+    async def transcribe(self, audio_path: str) -> str:
+        path = Path(audio_path)
+        audio_bytes = await asyncio.to_thread(path.read_bytes)
+        async with llm_slots:
+            transcription = await get_openai().audio.transcriptions.create(
+                model=TRANSCRIBE_MODEL, file=(path.name, audio_bytes)
+            )
+        return transcription.text
+
+    async def synthesize(self, text: str) -> AsyncIterator[bytes]:
+        async with tts_slots:
+            async for chunk in get_elevenlabs().text_to_speech.convert(
+                voice_id=TTS_VOICE_ID,
+                text=text,
+                model_id=TTS_MODEL_ID,
+                output_format=TTS_OUTPUT_FORMAT,
+            ):
+                if chunk:
+                    yield chunk
+
+    def tts_profile(self) -> tuple[str, ...]:
+        return (TTS_VOICE_ID, TTS_MODEL_ID, TTS_OUTPUT_FORMAT)
+
+    async def aclose(self):
+        await close_clients()
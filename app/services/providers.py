@@ -0,0 +1,72 @@
+import abc
+import contextlib
+from typing import Any, AsyncIterator
+
+from app.services.settings import MODEL_BACKEND
+
+
+class ModelProvider(abc.ABC):
+    """Interface for the model calls the app makes: vision, chat, STT and TTS.
+
+    Backends are selected with the MODEL_BACKEND setting, so the upload, chat
+    and call pipelines can run against OpenAI/ElevenLabs or fully offline.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def extract_menu(self, prompt: str, image_url: str) -> dict[str, Any]:
+        """Parses one menu page (an image or single-page PDF data URL) into `{"sections": [...]}`."""
+
+    @abc.abstractmethod
+    def stream_chat(self, messages: list[dict[str, str]]) -> AsyncIterator[str]:
+        """Streams the text deltas of a chat completion."""
+
+    @abc.abstractmethod
+    async def complete(self, messages: list[dict[str, str]]) -> str:
+        """Returns a full, non-streamed answer for the call tab."""
+
+    @abc.abstractmethod
+    async def transcribe(self, audio_path: str) -> str:
+        """Transcribes a recorded audio file to text."""
+
+    @abc.abstractmethod
+    def synthesize(self, text: str) -> AsyncIterator[bytes]:
+        """Streams the mp3 bytes of `text` spoken aloud."""
+
+    def tts_profile(self) -> tuple[str, ...]:
+        """Identifies the voice `synthesize` speaks with, e.g. (voice, model, format)."""
+        return (self.name,)
+
+    async def aclose(self):
+        """Releases pooled connections held by the backend."""
+
+
+_providers: dict[str, ModelProvider] = {}
+
+
+def get_provider(backend: str = "") -> ModelProvider:
+    """Returns the shared provider for `backend` (defaults to MODEL_BACKEND)."""
+    backend = backend or MODEL_BACKEND
+    provider = _providers.get(backend)
+    if provider is None:
+        if backend == "openai":
+            from app.services.openai_backend import OpenAIProvider
+
+            provider = OpenAIProvider()
+        elif backend == "fake":
+            from app.services.fake_backend import FakeProvider
+
+            provider = FakeProvider()
+        else:
+            raise ValueError(f"Unknown MODEL_BACKEND '{backend}'")
+        _providers[backend] = provider
+    return provider
+
+
+@contextlib.asynccontextmanager
+async def provider_lifespan():
+    """App lifespan task that closes the providers' pooled clients on shutdown."""
+    yield
+    for provider in _providers.values():
+        await provider.aclose()
@@ -0,0 +1,203 @@
+"""QR codes for menu links, rendered on demand as PNG or SVG.
+
+`qr_cache` keeps recently rendered codes in memory for the `/qr/<menu_id>`
+route. Printable sheets for every stored menu can be regenerated in bulk,
+one process per core since QR encoding is pure Python:
+
+    python -m app.services.qr --base-url https://menus.example.com \
+        --backend-url https://api.menus.example.com --out qr_sheets
+
+The codes point at the same links as the `/qr` route: the static `/m/<id>`
+page on the backend when MENU_STATIC_PAGES is on, the Reflex page otherwise.
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from html import escape
+from io import BytesIO
+from pathlib import Path
+
+import qrcode
+
+from app.services.file_io import write_bytes_atomic
+from app.services.metrics import span
+from app.services.settings import MENU_BASE_URL, MENU_STATIC_PAGES, MENUS_DIR, QR_CACHE_SIZE
+
+QR_FORMATS = ("png", "svg")
+_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+_BORDER = 4
+
+
+def menu_url(base_url: str, menu_id: str) -> str:
+    """Returns the public link a menu's QR code points at."""
+    return f"{base_url.rstrip('/')}/menu/{menu_id}"
+
+
+def guest_menu_url(
+    menu_id: str, base_url: str, backend_url: str, static_pages: bool = MENU_STATIC_PAGES
+) -> str:
+    """Returns the link guests get for a menu: its static page, or the Reflex page."""
+    if static_pages:
+        return f"{backend_url.rstrip('/')}/m/{menu_id}"
+    return menu_url(base_url, menu_id)
+
+
+def _make_qr(url: str) -> qrcode.QRCode:
+    qr = qrcode.QRCode(border=_BORDER)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr_png(url: str, size: int | None = None) -> bytes:
+    """Renders `url` as a QR code PNG, about `size` pixels wide if given."""
+    qr = _make_qr(url)
+    if size:
+        qr.box_size = max(1, size // (qr.modules_count + 2 * _BORDER))
+    buffer = BytesIO()
+    qr.make_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_qr_svg(url: str, size: int | None = None) -> bytes:
+    """Renders `url` as a QR code SVG: one path, with a run of dark modules per subpath."""
+    matrix = _make_qr(url).get_matrix()
+    n = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < n and row[x]:
+                x += 1
+            runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    side = size or n * 10
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{side}" height="{side}"'
+        f' viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(runs)}"/></svg>'
+    ).encode()
+
+
+@dataclass(frozen=True)
+class RenderedQR:
+    body: bytes
+    media_type: str
+    etag: str
+
+
+def render_qr(url: str, fmt: str, size: int | None = None) -> RenderedQR:
+    """Renders `url` in one of QR_FORMATS, with a strong ETag over the bytes."""
+    body = render_qr_svg(url, size) if fmt == "svg" else render_qr_png(url, size)
+    etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    return RenderedQR(body=body, media_type=_MEDIA_TYPES[fmt], etag=etag)
+
+
+class QRCache:
+    """LRU of rendered QR codes keyed by (url, format, size)."""
+
+    def __init__(self, maxsize: int = QR_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, RenderedQR] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str, fmt: str, size: int | None = None) -> RenderedQR:
+        key = (url, fmt, size)
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return rendered
+        with span("qr_render"):
+            rendered = render_qr(url, fmt, size)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = rendered
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+qr_cache = QRCache()
+
+
+def _write_menu_qrs(job: tuple[str, str, Path, tuple[str, ...], int]) -> str:
+    menu_id, url, out_dir, formats, size = job
+    for fmt in formats:
+        write_bytes_atomic(out_dir / f"{menu_id}.{fmt}", render_qr(url, fmt, size).body)
+    return menu_id
+
+
+def _sheet_html(urls: dict[str, str], fmt: str) -> str:
+    cards = "".join(
+        f'<figure><img src="{escape(m)}.{fmt}" alt="QR {escape(m)}">'
+        f"<figcaption>{escape(url)}</figcaption></figure>"
+        for m, url in urls.items()
+    )
+    return (
+        "<!doctype html><meta charset=utf-8><title>Menu QR codes</title><style>"
+        "body{display:grid;grid-template-columns:repeat(3,1fr);gap:1cm;font:10pt sans-serif}"
+        "figure{margin:0;text-align:center;break-inside:avoid}img{width:100%}"
+        f"</style>{cards}"
+    )
+
+
+def main(args):
+    from app.services.menu_repository import menu_repository
+
+    # Menus still only in menus/*.json are imported on first lookup, so include them too.
+    menu_ids = args.menu_ids or sorted(
+        {menu["id"] for menu in menu_repository.list_menus()}
+        | {path.stem for path in MENUS_DIR.glob("*.json")}
+    )
+    formats = tuple(args.formats.split(","))
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    urls = {
+        menu_id: guest_menu_url(menu_id, args.base_url, args.backend_url, args.static_pages)
+        for menu_id in menu_ids
+    }
+    jobs = [(menu_id, url, out_dir, formats, args.size) for menu_id, url in urls.items()]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for menu_id in pool.map(_write_menu_qrs, jobs):
+            print(f"wrote {menu_id}")
+    sheet = out_dir / "index.html"
+    write_bytes_atomic(sheet, _sheet_html(urls, formats[-1]).encode())
+    print(f"{len(menu_ids)} menus, sheet at {sheet}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("menu_ids", nargs="*")
+    parser.add_argument("--base-url", default=MENU_BASE_URL)
+    # Reflex reads the backend origin from API_URL too.
+    parser.add_argument("--backend-url", default=os.getenv("API_URL", ""))
+    parser.add_argument(
+        "--static-pages", action=argparse.BooleanOptionalAction, default=MENU_STATIC_PAGES
+    )
+    parser.add_argument("--out", default="qr_sheets")
+    parser.add_argument("--formats", default="svg,png")
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.static_pages and not args.backend_url:
+        parser.error("--backend-url is required while static menu pages are on")
+    if not args.static_pages and not args.base_url:
+        parser.error("--base-url is required without static menu pages")
+    main(args)
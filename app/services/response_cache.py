@@ -0,0 +1,192 @@
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.services.menu_cache import menu_cache
+from app.services.menu_index import normalize_term
+from app.services.settings import (
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+def _content_hash(sections: list[dict[str, Any]]) -> str:
+    return hashlib.blake2b(
+        json.dumps(sections, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+
+
+def menu_fingerprint(menu_id: str, sections: list[dict[str, Any]]) -> str:
+    """Returns the content hash of a menu, cached per version for stored menus."""
+    digest = menu_cache.get_derived(menu_id, "content_hash", _content_hash) if menu_id else None
+    return digest or _content_hash(sections)
+
+
+def normalize_question(text: str) -> str:
+    """Folds case, accents, punctuation and spacing out of a question."""
+    return " ".join(re.findall(r"\w+", normalize_term(text)))
+
+
+def context_digest(messages: list[dict[str, str]]) -> str:
+    """Digest of the conversation before the question, so follow-ups are keyed apart."""
+    turns = [f"{m['role']}:{normalize_question(m['content'])}" for m in messages]
+    return hashlib.blake2b("\n".join(turns).encode(), digest_size=8).hexdigest()
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class CachedResponse:
+    """A cached answer and, for calls, the mp3 files it was spoken into."""
+
+    text: str
+    audio: list[str] = field(default_factory=list)
+    expires_at: float = 0.0
+    vector: Counter = field(default_factory=Counter, repr=False)
+
+
+class ResponseCache:
+    """LRU + TTL cache of model answers keyed by menu version and question.
+
+    Keys are (channel, menu id, menu content hash, context digest, normalised
+    question). When a menu's content hash changes, its older answers are
+    dropped on the next lookup. With `similarity` above zero, a miss falls
+    back to the most similar cached question for the same menu and context
+    (cosine over character trigrams), which catches rewordings like
+    "how much is the paella?" / "how much is paella".
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        similarity: float = RESPONSE_CACHE_SIMILARITY,
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._menu_hashes: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _drop_stale_menu(self, menu_id: str, menu_hash: str):
+        if self._menu_hashes.get(menu_id, menu_hash) != menu_hash:
+            for key in [k for k in self._entries if k[1] == menu_id and k[2] != menu_hash]:
+                del self._entries[key]
+        self._menu_hashes[menu_id] = menu_hash
+
+    def _usable(self, entry: CachedResponse, audio_dir: Path | None, now: float) -> bool:
+        if entry.expires_at < now:
+            return False
+        return audio_dir is None or all((audio_dir / name).exists() for name in entry.audio)
+
+    def get(
+        self,
+        channel: str,
+        menu_id: str,
+        menu_hash: str,
+        context: str,
+        question: str,
+        audio_dir: Path | None = None,
+    ) -> CachedResponse | None:
+        """Returns a live cached answer, or None.
+
+        Pass `audio_dir` for call answers so entries whose mp3 files have been
+        deleted count as misses.
+        """
+        normalized = normalize_question(question)
+        key = (channel, menu_id, menu_hash, context, normalized)
+        now = time.time()
+        with self._lock:
+            self._drop_stale_menu(menu_id, menu_hash)
+            entry = self._entries.get(key)
+            if entry is not None and not self._usable(entry, audio_dir, now):
+                del self._entries[key]
+                entry = None
+            if entry is None and self.similarity > 0:
+                entry, key = self._most_similar(key, normalized, audio_dir, now)
+                if entry is not None:
+                    self.similar_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _most_similar(
+        self, key: tuple, normalized: str, audio_dir: Path | None, now: float
+    ) -> tuple[CachedResponse | None, tuple]:
+        vector = _trigrams(normalized)
+        best, best_key, best_score = None, key, self.similarity
+        for other_key, entry in self._entries.items():
+            if other_key[:4] != key[:4] or not self._usable(entry, audio_dir, now):
+                continue
+            score = _cosine(vector, entry.vector)
+            if score >= best_score:
+                best, best_key, best_score = entry, other_key, score
+        return best, best_key
+
+    def put(
+        self,
+        channel: str,
+        menu_id: str,
+        menu_hash: str,
+        context: str,
+        question: str,
+        text: str,
+        audio: list[str] | None = None,
+    ):
+        """Stores an answer (and its audio files) for this menu version and question."""
+        normalized = normalize_question(question)
+        entry = CachedResponse(
+            text=text,
+            audio=list(audio or []),
+            expires_at=time.time() + self.ttl_seconds,
+            vector=_trigrams(normalized) if self.similarity > 0 else Counter(),
+        )
+        with self._lock:
+            self._drop_stale_menu(menu_id, menu_hash)
+            key = (channel, menu_id, menu_hash, context, normalized)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def audio_files(self) -> set[str]:
+        """Returns the mp3 filenames referenced by cached call answers."""
+        with self._lock:
+            return {name for entry in self._entries.values() for name in entry.audio}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,236 @@
+"""Retention for the upload directory: per-category TTLs, a disk quota and pins.
+
+Everything the app writes lands in the Reflex upload dir. The sweeper sorts
+those files into categories by name, deletes the ones past their category's
+TTL, then evicts least-recently-used files until the directory fits the quota.
+Only files the app itself generates and can attribute are collected: call
+recordings, synthesised audio and temp files. Menu sources and QR codes are
+counted but never deleted, and neither are files still referenced (every
+stored or legacy menu, the upload index, the inputs of queued or running
+jobs, the audio of cached call answers) or files it does not recognise.
+
+Sweeps are dry runs, which only report, until RETENTION_DRY_RUN=0.
+
+    python -m app.services.retention [--dir uploaded_files] [--no-dry-run]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.services.file_io import run_io
+from app.services.jobs import job_queue
+from app.services.menu_repository import menu_repository
+from app.services.response_cache import response_cache
+from app.services.settings import (
+    RETENTION_DRY_RUN,
+    RETENTION_ENABLED,
+    RETENTION_MAX_BYTES,
+    RETENTION_MIN_AGE_SECONDS,
+    RETENTION_RECORDING_TTL_HOURS,
+    RETENTION_RESPONSE_TTL_HOURS,
+    RETENTION_SWEEP_SECONDS,
+    RETENTION_TTS_TTL_HOURS,
+    UPLOAD_DIR,
+)
+from app.services.tts_cache import TTS_PREFIX, tts_cache
+from app.services.upload_index import upload_index
+
+_UUID = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+_AUDIO_SUFFIXES = (".webm", ".ogg", ".wav", ".m4a", ".mp3")
+
+
+@dataclass(frozen=True)
+class Category:
+    """A kind of upload-dir file, recognised by name, and how long it may live unused.
+
+    `ttl_hours` is None for files that are counted towards the quota but never collected.
+    """
+
+    name: str
+    pattern: re.Pattern
+    ttl_hours: float | None
+
+
+# First match wins, so the audio recordings come before the generic uploads.
+CATEGORIES = (
+    # An unreferenced menu source or QR code may belong to a menu not imported
+    # yet, or be a fixture, so the sweeper cannot tell it is garbage.
+    Category("qr", re.compile(r"qr_[\w-]+\.png"), None),
+    Category("tts", re.compile(rf"{TTS_PREFIX}[0-9a-f]+\.mp3"), RETENTION_TTS_TTL_HOURS),
+    Category("response", re.compile(r"response_[\w-]+\.mp3"), RETENTION_RESPONSE_TTL_HOURS),
+    Category(
+        "recording",
+        re.compile(rf"{_UUID}_.+(?:{'|'.join(map(re.escape, _AUDIO_SUFFIXES))})", re.I),
+        RETENTION_RECORDING_TTL_HOURS,
+    ),
+    Category("source", re.compile(rf"{_UUID}_.+"), None),
+    # Leftovers of atomic writes interrupted by a crash.
+    Category("temp", re.compile(r"\..+\.tmp"), 1.0),
+)
+
+
+def categorize(name: str) -> Category | None:
+    """Returns the category of an upload-dir filename, or None for unmanaged files."""
+    for category in CATEGORIES:
+        if category.pattern.fullmatch(name):
+            return category
+    return None
+
+
+def pinned_files() -> set[str]:
+    """Returns the upload-dir filenames that must be kept whatever their age."""
+    pinned = set()
+    menu_ids, index_files = upload_index.referenced()
+    pinned.update(index_files)
+    for menu in menu_repository.list_menus():
+        menu_ids.add(menu["id"])
+        pinned.update(name for name in menu["source"].split(",") if name)
+    # Legacy menus/*.json menus are only imported on first view.
+    if menu_repository.legacy_dir is not None:
+        menu_ids.update(path.stem for path in menu_repository.legacy_dir.glob("*.json"))
+    pinned.update(f"qr_{menu_id}.png" for menu_id in menu_ids)
+    for payload in job_queue.active_payloads():
+        pinned.update(Path(path).name for path in payload.get("files", []))
+    pinned.update(response_cache.audio_files())
+    return pinned
+
+
+@dataclass
+class SweepReport:
+    """What a sweep found and removed."""
+
+    scanned: int = 0
+    total_bytes: int = 0
+    pinned: int = 0
+    expired: dict[str, int] = field(default_factory=dict)
+    evicted: int = 0
+    freed_bytes: int = 0
+    removed: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        expired = ", ".join(f"{k}={v}" for k, v in sorted(self.expired.items())) or "none"
+        return (
+            f"{self.scanned} files ({self.total_bytes} bytes, {self.pinned} pinned); "
+            f"expired {expired}; evicted {self.evicted}; freed {self.freed_bytes} bytes"
+        )
+
+
+def sweep(
+    directory: Path = UPLOAD_DIR,
+    max_bytes: int = RETENTION_MAX_BYTES,
+    min_age_seconds: float = RETENTION_MIN_AGE_SECONDS,
+    dry_run: bool = RETENTION_DRY_RUN,
+) -> SweepReport:
+    """Deletes expired files, then evicts the least recently used until under `max_bytes`.
+
+    A file's mtime is its last use (the TTS cache touches files it serves).
+    The quota counts every managed file, pinned ones included, but only
+    unpinned files are evicted.
+    """
+    report = SweepReport()
+    if not directory.is_dir():
+        return report
+    pinned = pinned_files()
+    now = time.time()
+    candidates = []
+    for path in directory.iterdir():
+        category = categorize(path.name)
+        if category is None:
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if not path.is_file():
+            continue
+        report.scanned += 1
+        report.total_bytes += stat.st_size
+        if path.name in pinned:
+            report.pinned += 1
+            continue
+        if category.ttl_hours is None:
+            continue
+        age = now - stat.st_mtime
+        if age < min_age_seconds:
+            continue
+        if age > category.ttl_hours * 3600:
+            report.expired[category.name] = report.expired.get(category.name, 0) + 1
+            _remove(path, stat.st_size, report, dry_run)
+        else:
+            candidates.append((stat.st_mtime, path, stat.st_size))
+    remaining = report.total_bytes - report.freed_bytes
+    for _, path, size in sorted(candidates, key=lambda c: c[0]):
+        if remaining <= max_bytes:
+            break
+        report.evicted += 1
+        _remove(path, size, report, dry_run)
+        remaining -= size
+    return report
+
+
+def _remove(path: Path, size: int, report: SweepReport, dry_run: bool):
+    if not dry_run:
+        path.unlink(missing_ok=True)
+    report.removed.append(path.name)
+    report.freed_bytes += size
+
+
+async def run_sweep(directory: Path = UPLOAD_DIR) -> SweepReport:
+    """Sweeps off the event loop and keeps the TTS cache index in step."""
+    report = await run_io(sweep, directory)
+    if not report.removed:
+        return report
+    if RETENTION_DRY_RUN:
+        logging.info(f"Upload retention dry run, would remove: {', '.join(report.removed)}")
+        logging.info(f"Upload retention dry run: {report.summary()}")
+        return report
+    tts_cache.forget(directory, [name for name in report.removed if name.startswith(TTS_PREFIX)])
+    logging.info(f"Upload retention sweep: {report.summary()}")
+    return report
+
+
+async def _sweeper(directory: Path, interval: float):
+    while True:
+        try:
+            await run_sweep(directory)
+        except Exception as e:
+            logging.exception(f"Upload retention sweep failed: {e}")
+        await asyncio.sleep(interval)
+
+
+@contextlib.asynccontextmanager
+async def retention_lifespan():
+    """App lifespan task that sweeps the upload dir every RETENTION_SWEEP_SECONDS."""
+    if not RETENTION_ENABLED:
+        yield
+        return
+    task = asyncio.create_task(
+        _sweeper(UPLOAD_DIR, RETENTION_SWEEP_SECONDS), name="upload-retention"
+    )
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def main(args):
+    report = sweep(Path(args.dir), dry_run=args.dry_run)
+    for name in report.removed:
+        print(f"{'would remove' if args.dry_run else 'removed'} {name}")
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", default=str(UPLOAD_DIR))
+    parser.add_argument(
+        "--dry-run", action=argparse.BooleanOptionalAction, default=RETENTION_DRY_RUN
+    )
+    main(parser.parse_args())
@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+
+MENUS_DIR = Path(os.getenv("MENUS_DIR", "menus"))
+MENU_CACHE_SIZE = int(os.getenv("MENU_CACHE_SIZE", "256"))
+# How long a cached menu is served before its version is checked again; saves in
+# this process invalidate it at once, so this only bounds staleness across workers.
+MENU_CACHE_REVALIDATE_SECONDS = float(os.getenv("MENU_CACHE_REVALIDATE_SECONDS", "2"))
+FILTER_PRICE_BUCKET = float(os.getenv("FILTER_PRICE_BUCKET", "5"))
+FILTER_SECTION_CACHE_SIZE = int(os.getenv("FILTER_SECTION_CACHE_SIZE", "2048"))
+DATA_DIR = Path(os.getenv("APP_DATA_DIR", "data"))
+UPLOAD_INDEX_PATH = DATA_DIR / "upload_index.json"
+MENU_DB_PATH = DATA_DIR / "menus.sqlite3"
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+# Opt-in: benchmarks.menu_snapshot shows cold snapshot loads slower than reading the JSON.
+MENU_SNAPSHOTS = os.getenv("MENU_SNAPSHOTS", "0") == "1"
+
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "openai")
+VISION_MODEL = os.getenv("VISION_MODEL", "gpt-4.1-2025-04-14")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4-turbo")
+CALL_MODEL = os.getenv("CALL_MODEL", "gpt-4.1-mini-2025-04-14")
+TRANSCRIBE_MODEL = os.getenv("TRANSCRIBE_MODEL", "gpt-4o-transcribe")
+TTS_VOICE_ID = os.getenv("TTS_VOICE_ID", "JBFqnCBsd6RMkjVDRZzb")
+TTS_MODEL_ID = os.getenv("TTS_MODEL_ID", "eleven_multilingual_v2")
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "mp3_44100_128")
+
+FAKE_LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "300"))
+FAKE_CHUNK_SIZE = int(os.getenv("FAKE_CHUNK_SIZE", "4"))
+FAKE_CHUNK_DELAY_MS = float(os.getenv("FAKE_CHUNK_DELAY_MS", "15"))
+FAKE_RESPONSE_CHARS = int(os.getenv("FAKE_RESPONSE_CHARS", "600"))
+FAKE_AUDIO_PATH = Path(os.getenv("FAKE_AUDIO_PATH", "assets/sample.mp3"))
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "8"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TTS_WARMUP_ENABLED = os.getenv("TTS_WARMUP_ENABLED", "1") == "1"
+TTS_WARMUP_MAX_ITEMS = int(os.getenv("TTS_WARMUP_MAX_ITEMS", "60"))
+TTS_WARMUP_CONCURRENCY = int(os.getenv("TTS_WARMUP_CONCURRENCY", "2"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_KEEPALIVE_CONNECTIONS", "32"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "120"))
+
+CALL_STREAMING = os.getenv("CALL_STREAMING", "1") == "1"
+CALL_SENTENCE_MIN_CHARS = int(os.getenv("CALL_SENTENCE_MIN_CHARS", "24"))
+
+CHAT_FLUSH_INTERVAL_MS = float(os.getenv("CHAT_FLUSH_INTERVAL_MS", "50"))
+FAST_ANSWERS_ENABLED = os.getenv("FAST_ANSWERS_ENABLED", "1") == "1"
+FAST_MATCH_CUTOFF = float(os.getenv("FAST_MATCH_CUTOFF", "0.8"))
+FAST_STATS_LOG_EVERY = int(os.getenv("FAST_STATS_LOG_EVERY", "50"))
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "21600"))
+# Trigram cosine similarity (0-1) for reusing answers to reworded questions; 0 disables it.
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+CHAT_FLUSH_CHARS = int(os.getenv("CHAT_FLUSH_CHARS", "64"))
+# Estimated tokens of history (summary + recent turns) sent with each chat turn, on top of the system prompt.
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1500"))
+CHAT_KEEP_MESSAGES = int(os.getenv("CHAT_KEEP_MESSAGES", "8"))
+CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "6"))
+CHAT_SUMMARY_MAX_WORDS = int(os.getenv("CHAT_SUMMARY_MAX_WORDS", "120"))
+# Messages kept in the synced chat state; older ones are only in the summary.
+CHAT_DISPLAY_MESSAGES = int(os.getenv("CHAT_DISPLAY_MESSAGES", "40"))
+CHAT_STATS_LOG_EVERY = int(os.getenv("CHAT_STATS_LOG_EVERY", "50"))
+
+# Public origin of the frontend that menu links and QR codes point at; empty uses Reflex's deploy_url.
+MENU_BASE_URL = os.getenv("MENU_BASE_URL", "")
+# Menu links and QR codes open the static /m/<menu_id> page instead of the Reflex page.
+MENU_STATIC_PAGES = os.getenv("MENU_STATIC_PAGES", "1") == "1"
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "256"))
+QR_DEFAULT_SIZE = int(os.getenv("QR_DEFAULT_SIZE", "512"))
+QR_MAX_SIZE = int(os.getenv("QR_MAX_SIZE", "2048"))
+QR_MAX_AGE_SECONDS = int(os.getenv("QR_MAX_AGE_SECONDS", "86400"))
+
+# Same variable Reflex reads for rx.get_upload_dir(), so background tasks see the same directory.
+UPLOAD_DIR = Path(os.getenv("REFLEX_UPLOADED_FILES_DIR", "uploaded_files"))
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "1") == "1"
+# Only logs what a sweep would delete; set to 0 once the dry-run reports look right.
+RETENTION_DRY_RUN = os.getenv("RETENTION_DRY_RUN", "1") == "1"
+RETENTION_SWEEP_SECONDS = float(os.getenv("RETENTION_SWEEP_SECONDS", "900"))
+RETENTION_MAX_BYTES = int(os.getenv("RETENTION_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Files younger than this are never collected, so in-flight uploads and writes are safe.
+RETENTION_MIN_AGE_SECONDS = float(os.getenv("RETENTION_MIN_AGE_SECONDS", "600"))
+RETENTION_RECORDING_TTL_HOURS = float(os.getenv("RETENTION_RECORDING_TTL_HOURS", "1"))
+RETENTION_RESPONSE_TTL_HOURS = float(os.getenv("RETENTION_RESPONSE_TTL_HOURS", "24"))
+RETENTION_TTS_TTL_HOURS = float(os.getenv("RETENTION_TTS_TTL_HOURS", "336"))
+
+IO_WORKERS = int(os.getenv("IO_WORKERS", "4"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+IMAGE_PREP_ENABLED = os.getenv("IMAGE_PREP_ENABLED", "1") == "1"
+IMAGE_PREP_MAX_SIDE = int(os.getenv("IMAGE_PREP_MAX_SIDE", "2048"))
+IMAGE_PREP_SHORT_SIDE = int(os.getenv("IMAGE_PREP_SHORT_SIDE", "768"))
+IMAGE_PREP_GRAYSCALE = os.getenv("IMAGE_PREP_GRAYSCALE", "1") == "1"
+IMAGE_PREP_QUALITY = int(os.getenv("IMAGE_PREP_QUALITY", "80"))
+
+EXTRACTION_PAGE_WORKERS = int(os.getenv("EXTRACTION_PAGE_WORKERS", "4"))
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "12"))
+
+JOBS_DB_PATH = DATA_DIR / "jobs.sqlite3"
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "4"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+# A running job whose worker has not renewed its lease for this long is assumed dead and re-queued.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+
+# How often the event loop's wake-up delay is sampled into the event_loop_lag histogram; 0 disables it.
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
@@ -0,0 +1,54 @@
+import asyncio
+from typing import AsyncIterator
+
+from app.services.settings import CHAT_FLUSH_CHARS, CHAT_FLUSH_INTERVAL_MS
+
+
+async def coalesce(
+    deltas: AsyncIterator[str],
+    interval_ms: float = CHAT_FLUSH_INTERVAL_MS,
+    max_chars: int = CHAT_FLUSH_CHARS,
+) -> AsyncIterator[str]:
+    """Buffers streamed text deltas and yields them in batches.
+
+    A batch is flushed once it holds `max_chars` characters or its first
+    delta is `interval_ms` old, whichever comes first, so a slow stream is
+    never held back by more than the interval. An interval of 0 disables
+    coalescing and yields every delta as it arrives.
+    """
+    if interval_ms <= 0:
+        async for delta in deltas:
+            yield delta
+        return
+    loop = asyncio.get_running_loop()
+    interval = interval_ms / 1000
+    iterator = deltas.__aiter__()
+    buffer = ""
+    deadline: float | None = None
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield buffer
+                buffer, deadline = "", None
+                continue
+            finished, pending = pending, None
+            try:
+                delta = finished.result()
+            except StopAsyncIteration:
+                break
+            buffer += delta
+            if deadline is None:
+                deadline = loop.time() + interval
+            if len(buffer) >= max_chars or loop.time() >= deadline:
+                yield buffer
+                buffer, deadline = "", None
+        if buffer:
+            yield buffer
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.services.file_io import run_io, write_stream
+from app.services.metrics import span
+from app.services.providers import ModelProvider
+from app.services.settings import TTS_CACHE_MAX_BYTES
+
+if TYPE_CHECKING:
+    from app.services.voice_pipeline import StageTimer
+
+TTS_PREFIX = "tts_"
+
+
+def tts_key(text: str, profile: tuple[str, ...]) -> str:
+    """Content address of `text` spoken with a voice/model/format profile."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256("\0".join([*profile, normalized]).encode()).hexdigest()[:32]
+
+
+class TTSCache:
+    """Content-addressed store of synthesised speech in the upload dir.
+
+    Each phrase is written once, to `tts_<key>.mp3`, and served from disk from
+    then on. Files are evicted least-recently-used first once the directory
+    holds more than `max_bytes`; a file's mtime is its last use, so the order
+    survives restarts.
+    """
+
+    def __init__(self, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._indexes: dict[Path, OrderedDict[str, int]] = {}
+        self._pending: dict[tuple[Path, str], asyncio.Future] = {}
+        self._scan_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _scan(directory: Path) -> OrderedDict[str, int]:
+        files = []
+        for path in directory.glob(f"{TTS_PREFIX}*.mp3"):
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        return OrderedDict((name, size) for _, name, size in sorted(files))
+
+    async def _index(self, directory: Path) -> OrderedDict[str, int]:
+        if directory not in self._indexes:
+            async with self._scan_lock:
+                if directory not in self._indexes:
+                    await run_io(directory.mkdir, parents=True, exist_ok=True)
+                    self._indexes[directory] = await run_io(self._scan, directory)
+        return self._indexes[directory]
+
+    @staticmethod
+    def _evict_files(paths: list[Path]):
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    async def _evict(self, directory: Path, index: OrderedDict[str, int], keep: str):
+        total = sum(index.values())
+        victims = []
+        for name in list(index):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= index.pop(name)
+            victims.append(directory / name)
+        if victims:
+            self.evictions += len(victims)
+            await run_io(self._evict_files, victims)
+
+    async def speak(
+        self,
+        provider: ModelProvider,
+        text: str,
+        directory: Path,
+        timer: "StageTimer | None" = None,
+    ) -> str:
+        """Returns the filename of `text` spoken aloud, synthesising it only on a miss.
+
+        Concurrent requests for the same phrase share one synthesis.
+        """
+        name = f"{TTS_PREFIX}{tts_key(text, provider.tts_profile())}.mp3"
+        index = await self._index(directory)
+        path = directory / name
+        if name in index:
+            if await run_io(path.exists):
+                self.hits += 1
+                index.move_to_end(name)
+                await run_io(os.utime, path)
+                return name
+            del index[name]
+        pending = self._pending.get((directory, name))
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(directory, name)] = future
+        tmp_path = directory / f".{name}.{uuid.uuid4().hex}.tmp"
+        try:
+            chunks = provider.synthesize(text)
+            if timer is not None:
+                chunks = timer.watch(chunks, "tts_first_byte")
+            with span("tts_synthesis"):
+                size = await write_stream(tmp_path, chunks)
+            await run_io(os.replace, tmp_path, path)
+            index[name] = size
+            index.move_to_end(name)
+            await self._evict(directory, index, keep=name)
+            future.set_result(name)
+            return name
+        except BaseException as e:
+            tmp_path.unlink(missing_ok=True)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else was waiting on it.
+                future.exception()
+            raise
+        finally:
+            del self._pending[(directory, name)]
+
+    async def warm(
+        self, provider: ModelProvider, phrases: list[str], directory: Path, concurrency: int
+    ) -> int:
+        """Pre-renders phrases a few at a time, returning how many were synthesised."""
+        slots = asyncio.Semaphore(max(1, concurrency))
+        misses_before = self.misses
+
+        async def render(phrase: str):
+            async with slots:
+                try:
+                    await self.speak(provider, phrase, directory)
+                except Exception as e:
+                    logging.exception(f"TTS warm-up failed for '{phrase[:40]}': {e}")
+
+        await asyncio.gather(*(render(phrase) for phrase in phrases if phrase.strip()))
+        return self.misses - misses_before
+
+    def forget(self, directory: Path, names: list[str]):
+        """Drops files deleted by someone else (e.g. the retention sweeper) from the index."""
+        for indexed_dir, index in self._indexes.items():
+            if indexed_dir.resolve() == directory.resolve():
+                for name in names:
+                    index.pop(name, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "files": sum(len(index) for index in self._indexes.values()),
+            "bytes": sum(sum(index.values()) for index in self._indexes.values()),
+            "max_bytes": self.max_bytes,
+        }
+
+
+tts_cache = TTSCache()
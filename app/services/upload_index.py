@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+from app.services.file_io import write_json_atomic
+from app.services.settings import UPLOAD_INDEX_PATH
+
+
+def content_hash(data: bytes) -> str:
+    """Returns the SHA-256 hex digest used to identify an uploaded menu image."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def combined_hash(digests: list[str]) -> str:
+    """Returns the digest identifying a multi-file upload (order matters)."""
+    if len(digests) == 1:
+        return digests[0]
+    return content_hash("\n".join(digests).encode())
+
+
+class UploadIndex:
+    """Persistent content-hash -> menu_id index of already-extracted uploads.
+
+    The index is a small JSON file that is rewritten atomically on every
+    change, so a crash mid-write never leaves it half-written.
+    """
+
+    def __init__(self, path: Path = UPLOAD_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] | None = None
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._entries = {}
+            except json.JSONDecodeError as e:
+                logging.exception(f"Upload index {self.path} is corrupt, starting empty: {e}")
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.path, self._entries)
+
+    def lookup(self, digest: str) -> str | None:
+        """Returns the menu id previously extracted from this content, if any."""
+        with self._lock:
+            entry = self._load().get(digest)
+        return entry["menu_id"] if entry else None
+
+    def record(self, digest: str, menu_id: str, source_file: str = ""):
+        """Remembers that this content was extracted into `menu_id`."""
+        with self._lock:
+            self._load()[digest] = {
+                "menu_id": menu_id,
+                "source_file": source_file,
+                "created_at": time.time(),
+            }
+            self._save()
+
+    def forget(self, digest: str) -> bool:
+        """Drops an entry so the next upload of this content is extracted again."""
+        with self._lock:
+            removed = self._load().pop(digest, None) is not None
+            if removed:
+                self._save()
+        return removed
+
+    def referenced(self) -> tuple[set[str], set[str]]:
+        """Returns the menu ids and the upload filenames the index points at."""
+        with self._lock:
+            entries = list(self._load().values())
+        menu_ids = {e["menu_id"] for e in entries}
+        files = {name for e in entries for name in e.get("source_file", "").split(",") if name}
+        return menu_ids, files
+
+    def forget_menu(self, menu_id: str) -> int:
+        """Drops every entry pointing at `menu_id`, e.g. after the menu is deleted."""
+        with self._lock:
+            entries = self._load()
+            stale = [d for d, e in entries.items() if e["menu_id"] == menu_id]
+            for digest in stale:
+                del entries[digest]
+            if stale:
+                self._save()
+        return len(stale)
+
+
+upload_index = UploadIndex()
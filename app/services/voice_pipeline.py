@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import re
+import time
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.services.metrics import observe
+from app.services.providers import ModelProvider
+from app.services.settings import CALL_SENTENCE_MIN_CHARS
+from app.services.tts_cache import tts_cache
+
+# Spoken before the first answer of a call; pre-rendered when a menu is created.
+CALL_GREETING = "¡Hola! Déjame mirar la carta un momento."
+
+_SENTENCE_END = re.compile(r"[.!?…;:\n]+[\"')\]]*\s")
+
+
+class StageTimer:
+    """Records time-to-first-byte and duration of each call pipeline stage, in ms."""
+
+    def __init__(self, started_at: float | None = None, timings: dict[str, float] | None = None):
+        """`started_at` (a time.time()) and `timings` continue a turn begun in another event."""
+        elapsed = 0.0 if started_at is None else max(0.0, time.time() - started_at)
+        self.started = time.perf_counter() - elapsed
+        self.started_at = time.time() - elapsed
+        self.timings: dict[str, float] = dict(timings or {})
+
+    def mark(self, name: str):
+        """Records the elapsed time for `name`, keeping only the first mark.
+
+        Each mark is also observed as the `call_<name>` stage, measured from
+        the start of the turn.
+        """
+        if name not in self.timings:
+            elapsed = time.perf_counter() - self.started
+            self.timings[name] = round(elapsed * 1000, 1)
+            observe(f"call_{name}", elapsed)
+
+    async def watch(self, chunks: AsyncIterator, name: str) -> AsyncIterator:
+        """Passes `chunks` through, marking `name` when the first one arrives."""
+        async for chunk in chunks:
+            self.mark(name)
+            yield chunk
+
+    def log(self, label: str):
+        logging.info(f"{label} timings (ms since start): {self.timings}")
+
+
+async def split_sentences(
+    deltas: AsyncIterator[str], min_chars: int = CALL_SENTENCE_MIN_CHARS
+) -> AsyncIterator[str]:
+    """Regroups streamed text deltas into sentences of at least `min_chars`."""
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+        while True:
+            cut = None
+            for match in _SENTENCE_END.finditer(buffer):
+                if match.end() >= min_chars:
+                    cut = match.end()
+                    break
+            if cut is None:
+                break
+            sentence, buffer = buffer[:cut].strip(), buffer[cut:]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def stream_spoken_answer(
+    provider: ModelProvider,
+    messages: list[dict[str, str]],
+    out_dir: Path,
+    timer: StageTimer,
+    spoken: list[str] | None = None,
+) -> AsyncIterator[str]:
+    """Streams the answer sentence by sentence into TTS, yielding mp3 segment filenames.
+
+    The LLM keeps generating in a background task while earlier sentences are
+    synthesised, so the first segment is ready after one sentence rather than
+    after the whole answer. Sentences spoken before come straight from the TTS
+    cache. Each synthesised sentence is appended to `spoken`.
+    """
+    sentences: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def timed_deltas() -> AsyncIterator[str]:
+        async for delta in provider.stream_chat(messages):
+            timer.mark("llm_first_token")
+            yield delta
+        timer.mark("llm_done")
+
+    async def produce():
+        try:
+            async for sentence in split_sentences(timed_deltas()):
+                timer.mark("first_sentence")
+                await sentences.put(sentence)
+        finally:
+            await sentences.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (sentence := await sentences.get()) is not None:
+            filename = await tts_cache.speak(provider, sentence, out_dir, timer)
+            timer.mark("first_audio")
+            if spoken is not None:
+                spoken.append(sentence)
+            yield filename
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+        timer.mark("done")
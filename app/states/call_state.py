@@ -1,26 +1,29 @@
 import reflex as rx
 import asyncio
-import os
 from pathlib import Path
 import logging
 import uuid
-import base64
 from app.states.menu_state import MenuState
-from elevenlabs.client import ElevenLabs
-from elevenlabs.play import play
-import os
-from openai import OpenAI
+from app.services.menu_prompt import build_system_prompt, menu_prompt
+from app.services.providers import get_provider
+from app.services.response_cache import menu_fingerprint, response_cache
+from app.services.settings import CALL_STREAMING, RESPONSE_CACHE_ENABLED
+from app.services.voice_pipeline import CALL_GREETING, StageTimer, stream_spoken_answer
+from app.services.file_io import save_upload
+from app.services.fast_answers import fast_answer, spoken_text
+from app.services.tts_cache import tts_cache
 
 CALL_UPLOAD_ID = "audio_upload"
+CALL_INSTRUCTIONS = "answer questions from the user about the menu, recommend it stuff. you will be the sommelier of it at a bar"
 
 
 def menu_to_str(menu_id: str) -> str:
-    menu_path = Path("menus") / f"{menu_id}.json"
-    print("MENU PATH = ", menu_path)
-    if menu_path.exists():
-        with open(menu_path, "r", encoding="utf-8") as f:
-            return f.read()
-    return ""
+    """Returns the compact prompt form of a menu, read through the shared menu cache."""
+    try:
+        return menu_prompt(menu_id) or ""
+    except Exception as e:
+        logging.exception(f"Failed to read menu '{menu_id}': {e}")
+        return ""
 
 
 class CallState(rx.State):
@@ -31,47 +34,80 @@ class CallState(rx.State):
     error_message: str = ""
     audio_response_src: str = ""
     uploaded_audio_path: str = ""
+    audio_segments: list[str] = []
+    segment_index: int = 0
+    _last_timings: dict[str, float] = {}
+    _greeted: bool = False
+    _question: str = ""
+    _question_at: float = 0.0
 
-    async def _generate_audio_response(self) -> str | None:
-        """Generates a mock audio response by copying a sample file to a new unique path."""
-        client = OpenAI()
-        audio_file = open(self.uploaded_audio_path, "rb")
-        transcription = client.audio.transcriptions.create(
-            model="gpt-4o-transcribe", file=audio_file
-        )
+    @rx.var
+    def current_segment(self) -> str:
+        """The streamed answer segment that should be playing now."""
+        if self.segment_index < len(self.audio_segments):
+            return self.audio_segments[self.segment_index]
+        return ""
+
+    async def _call_messages(self, transcription: str) -> list[dict[str, str]]:
+        """Builds the model input for a transcribed question."""
         menu_state = await self.get_state(MenuState)
-        stream = client.responses.create(
-            model="gpt-4.1-mini-2025-04-14",
-            input=[
-                {
-                    "role": "system",
-                    "content": "answer questions from the user about the menu, recommend it stuff. you will be the sommelier of it at a bar "
-                    + menu_to_str(menu_state.current_menu_id),
-                },
-                {"role": "user", "content": transcription.text},
-            ],
-        )
-        elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-        audio = elevenlabs.text_to_speech.convert(
-            text=stream.output_text,
-            voice_id="JBFqnCBsd6RMkjVDRZzb",
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
+        return [
+            {
+                "role": "system",
+                "content": build_system_prompt(
+                    CALL_INSTRUCTIONS, menu_to_str(menu_state.current_menu_id)
+                ),
+            },
+            {"role": "user", "content": transcription},
+        ]
+
+    async def _cache_key(self, transcription: str) -> tuple:
+        """Response cache key of a spoken question; calls have no prior context."""
+        menu_state = await self.get_state(MenuState)
+        menu_id = menu_state.current_menu_id
+        return (
+            "call",
+            menu_id,
+            menu_fingerprint(menu_id, menu_state.menu_data),
+            "",
+            transcription,
         )
+
+    async def _generate_audio_response(
+        self, messages: list[dict[str, str]], timer: StageTimer
+    ) -> tuple[str, str] | None:
+        """Answers the question and synthesises the whole answer to one mp3.
+
+        Returns the mp3 filename and the answer text.
+        """
+        provider = get_provider()
+        answer = await provider.complete(messages)
+        timer.mark("llm_done")
         try:
-            upload_dir = rx.get_upload_dir()
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            unique_filename = f"response_{uuid.uuid4()}.mp3"
-            new_audio_path = upload_dir / unique_filename
-            with new_audio_path.open("wb") as dest_file:
-                for chunk in audio:
-                    if chunk:
-                        dest_file.write(chunk)
-            return unique_filename
+            filename = await tts_cache.speak(provider, answer, rx.get_upload_dir(), timer)
+            timer.mark("first_audio")
+            return filename, answer
         except Exception as e:
-            logging.exception(f"Failed to create mock audio response: {e}")
+            logging.exception(f"Failed to synthesise the call answer: {e}")
             return None
 
+    async def _stream_audio_response(
+        self, messages: list[dict[str, str]], timer: StageTimer, spoken: list[str]
+    ):
+        """Streams the answer as sentence-sized mp3 segments while it is generated."""
+        upload_dir = rx.get_upload_dir()
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        async for filename in stream_spoken_answer(
+            get_provider(), messages, upload_dir, timer, spoken
+        ):
+            yield filename
+
+    @rx.event
+    def next_segment(self):
+        """Advances playback to the next streamed answer segment."""
+        if self.segment_index < len(self.audio_segments):
+            self.segment_index += 1
+
     @rx.event
     def start_recording(self):
         """Starts the recording state and triggers JS recording."""
@@ -85,11 +121,17 @@ class CallState(rx.State):
         self.is_processing = True
         self.error_message = ""
         self.audio_response_src = ""
+        self.audio_segments = []
+        self.segment_index = 0
         return rx.call_script("stopAudioRecording()")
 
     @rx.event
     async def handle_audio_upload(self, files: list[rx.UploadFile]):
-        """Handles the uploaded audio file from the frontend."""
+        """Saves and transcribes the recording, then answers it in `answer_call`.
+
+        Upload handlers hold the session lock until they return, so anything
+        streamed from here would only reach the player once it is all done.
+        """
         if not files:
             self.error_message = "Audio recording failed. Please try again."
             self.is_processing = False
@@ -97,32 +139,131 @@ class CallState(rx.State):
         self.is_processing = True
         self.error_message = ""
         self.audio_response_src = ""
+        self.audio_segments = []
+        self.segment_index = 0
         yield
         try:
             uploaded_file = files[0]
-            upload_data = await uploaded_file.read()
             upload_dir = rx.get_upload_dir()
             upload_dir.mkdir(parents=True, exist_ok=True)
             unique_filename = f"{uuid.uuid4()}_{uploaded_file.name}"
             file_path = upload_dir / unique_filename
-            with file_path.open("wb") as f:
-                f.write(upload_data)
+            timer = StageTimer()
+            await save_upload(uploaded_file, file_path)
             self.uploaded_audio_path = str(file_path)
-            response_filename = await self._generate_audio_response()
-            if response_filename:
-                self.audio_response_src = response_filename
-            else:
-                self.error_message = "Could not generate audio response."
+            transcription = await get_provider().transcribe(self.uploaded_audio_path)
+            timer.mark("stt")
+            cache_key = await self._cache_key(transcription)
+            cached = (
+                response_cache.get(*cache_key, audio_dir=upload_dir)
+                if RESPONSE_CACHE_ENABLED
+                else None
+            )
+            if cached is not None and cached.audio:
+                timer.mark("first_audio")
+                self._last_timings = timer.timings
+                timer.log("Cached call response")
+                self.audio_response_src = cached.audio[0]
+                if len(cached.audio) > 1:
+                    self.audio_segments = list(cached.audio)
+                self.is_processing = False
+                return
+            self._question = transcription
+            self._question_at = timer.started_at
+            self._last_timings = timer.timings
+            yield CallState.answer_call
         except Exception as e:
             logging.exception(f"Audio processing failed: {e}")
             self.error_message = "An unexpected error occurred during processing."
-        finally:
             self.is_processing = False
 
+    def _add_segment(self, filename: str):
+        """Queues a segment for the player; the first one also ends the spinner."""
+        if not self.audio_segments:
+            self.audio_response_src = filename
+            self.is_processing = False
+        self.audio_segments.append(filename)
+
+    async def _play_greeting(self, upload_dir: Path):
+        """Plays the greeting while the model thinks, unless the answer is already playing."""
+        try:
+            greeting = await tts_cache.speak(get_provider(), CALL_GREETING, upload_dir)
+        except Exception as e:
+            logging.exception(f"Call greeting failed: {e}")
+            return
+        async with self:
+            if not self.audio_segments:
+                self._add_segment(greeting)
+
+    @rx.event(background=True)
+    async def answer_call(self):
+        """Answers the transcribed question, adding spoken segments as they are synthesised."""
+        async with self:
+            question = self._question
+            timer = StageTimer(self._question_at, self._last_timings)
+            cache_key = await self._cache_key(question)
+            menu_state = await self.get_state(MenuState)
+            reply = fast_answer(menu_state.current_menu_id, menu_state.menu_data, question)
+            messages = await self._call_messages(question)
+            greet = CALL_STREAMING and reply is None and not self._greeted
+            self._greeted = True
+        upload_dir = rx.get_upload_dir()
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        greeting = asyncio.create_task(self._play_greeting(upload_dir)) if greet else None
+        error = ""
+        try:
+            if reply is not None:
+                filename = await tts_cache.speak(
+                    get_provider(), spoken_text(reply), upload_dir, timer
+                )
+                timer.mark("first_audio")
+                timer.log("Fast-path call response")
+                async with self:
+                    self.audio_response_src = filename
+            elif CALL_STREAMING:
+                spoken = []
+                answer_segments = []
+                try:
+                    async for segment in self._stream_audio_response(messages, timer, spoken):
+                        answer_segments.append(segment)
+                        async with self:
+                            self._add_segment(segment)
+                finally:
+                    timer.log("Streamed call response")
+                if not answer_segments:
+                    error = "Could not generate audio response."
+                elif RESPONSE_CACHE_ENABLED:
+                    response_cache.put(*cache_key, " ".join(spoken), audio=answer_segments)
+            else:
+                response = await self._generate_audio_response(messages, timer)
+                timer.log("Call response")
+                if response:
+                    filename, answer = response
+                    async with self:
+                        self.audio_response_src = filename
+                    if RESPONSE_CACHE_ENABLED:
+                        response_cache.put(*cache_key, answer, audio=[filename])
+                else:
+                    error = "Could not generate audio response."
+        except Exception as e:
+            logging.exception(f"Audio processing failed: {e}")
+            error = "An unexpected error occurred during processing."
+        finally:
+            if greeting is not None:
+                greeting.cancel()
+                await asyncio.gather(greeting, return_exceptions=True)
+            async with self:
+                self._last_timings = timer.timings
+                if error:
+                    self.error_message = error
+                self.is_processing = False
+
     @rx.event
     def reset_state(self):
         """Resets the call page to its initial state."""
         self.is_recording = False
         self.is_processing = False
         self.error_message = ""
-        self.audio_response_src = ""
\ No newline at end of file
+        self.audio_response_src = ""
+        self.audio_segments = []
+        self.segment_index = 0
\ No newline at end of file
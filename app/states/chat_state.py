@@ -1,9 +1,25 @@
 import reflex as rx
 from typing import TypedDict
-import asyncio
+import time
 from app.states.menu_state import MenuState
-from openai import OpenAI
-from pathlib import Path
+from app.services.fast_answers import fast_answer, fast_path_stats
+from app.services.response_cache import context_digest, menu_fingerprint, response_cache
+from app.services.settings import (
+    CHAT_DISPLAY_MESSAGES,
+    FAST_ANSWERS_ENABLED,
+    RESPONSE_CACHE_ENABLED,
+)
+from app.services.chat_context import (
+    context_window,
+    fold_range,
+    prompt_token_stats,
+    record_prompt_tokens,
+    summarize,
+)
+from app.services.metrics import observe
+from app.services.providers import get_provider
+from app.services.streaming import coalesce
+from app.services.menu_prompt import build_system_prompt, menu_prompt
 import logging
 
 
@@ -12,21 +28,29 @@ class Message(TypedDict):
     content: str
 
 
+CHAT_INSTRUCTIONS = """
+You are an expert sommelier and waiter. Your goal is to guide the user through the menu,
+recommending food and drinks, especially Damm products if available.
+Your tone should be brief, friendly, and conversational, like you're speaking to someone at a bar or restaurant.
+Keep your messages short and to the point. Avoid sounding like an AI.
+
+This is the menu you are working with:
+"""
+
+
 def menu_to_str(menu_id: str) -> str:
-    """Reads menu data from a JSON file."""
+    """Returns the compact prompt form of a menu, read through the shared menu cache."""
     if not menu_id:
         return "{}"
-    menu_path = Path("menus") / f"{menu_id}.json"
-    logging.info(f"Loading menu from path: {menu_path}")
-    if menu_path.exists():
-        try:
-            with open(menu_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            logging.exception(f"Failed to read menu file {menu_path}: {e}")
-            return "{}"
-    logging.warning(f"Menu file not found at {menu_path}")
-    return "{}"
+    try:
+        menu_text = menu_prompt(menu_id)
+    except Exception as e:
+        logging.exception(f"Failed to read menu '{menu_id}': {e}")
+        return "{}"
+    if menu_text is None:
+        logging.warning(f"Menu '{menu_id}' not found")
+        return "{}"
+    return menu_text
 
 
 class ChatState(rx.State):
@@ -35,36 +59,92 @@ class ChatState(rx.State):
     messages: list[Message] = []
     current_message: str = ""
     is_streaming: bool = False
+    _summary: str = ""
+    _folded: int = 0
+    _turns: int = 0
 
     def _add_message(self, content: str, role: str):
         """Helper to add a new message to the list."""
         self.messages.append({"role": role, "content": content})
 
+    def _trim_history(self):
+        """Drops the oldest already-summarised messages beyond CHAT_DISPLAY_MESSAGES."""
+        drop = min(len(self.messages) - CHAT_DISPLAY_MESSAGES, self._folded)
+        if drop > 0:
+            self.messages = self.messages[drop:]
+            self._folded -= drop
+
+    async def _fold_history(self):
+        """Folds the oldest unsummarised turns into the running summary, a batch at a time."""
+        async with self:
+            fold = fold_range(self.messages, self._folded)
+            if fold is None:
+                self._trim_history()
+                return
+            start, end = fold
+            summary = self._summary
+            batch = [dict(m) for m in self.messages[start:end]]
+        try:
+            summary = await summarize(summary, batch)
+        except Exception as e:
+            logging.exception(f"Chat summary failed, keeping recent turns only: {e}")
+            return
+        async with self:
+            if self._folded != start:
+                return
+            self._summary = summary
+            self._folded = end
+            self._trim_history()
+        prompt_token_stats.record_fold()
+
+    @rx.event(background=True)
+    async def compact_history(self):
+        """Folds and trims the history after a turn answered without the model."""
+        await self._fold_history()
+
     @rx.event(background=True)
     async def stream_response(self):
-        """Streams the mock response to the user."""
+        """Answers the latest message from the response cache, or streams it from the model."""
         async with self:
             menu_state = await self.get_state(MenuState)
-            menu_json_str = menu_to_str(menu_state.current_menu_id)
-            self.is_streaming = True
-            self._add_message("", "assistant")
-            client_openai = OpenAI()
-            sys_prompt = f"\n            You are an expert sommelier and waiter. Your goal is to guide the user through the menu,\n            recommending food and drinks, especially Damm products if available.\n            Your tone should be brief, friendly, and conversational, like you're speaking to someone at a bar or restaurant.\n            Keep your messages short and to the point. Avoid sounding like an AI.\n\n            This is the menu you are working with:\n            \n            {menu_json_str}\n            \n            "
-            messages_for_api = [
-                {"role": "system", "content": sys_prompt}
-            ] + self.messages
-        try:
-            stream = client_openai.chat.completions.create(
-                model="gpt-4-turbo", messages=messages_for_api, stream=True
+            menu_id = menu_state.current_menu_id
+            history = context_window(self.messages[self._folded :], self._summary)
+            cache_key = (
+                "chat",
+                menu_id,
+                menu_fingerprint(menu_id, menu_state.menu_data),
+                context_digest(history[:-1]),
+                self.messages[-1]["content"],
             )
-            for chunk in stream:
-                delta = chunk.choices[0].delta.content
-                if delta:
-                    async with self:
-                        self.messages[-1]["content"] += delta
-                    yield
+            cached = response_cache.get(*cache_key) if RESPONSE_CACHE_ENABLED else None
+            if cached is not None:
+                self._add_message(cached.text, "assistant")
+            else:
+                self.is_streaming = True
+                self._add_message("", "assistant")
+                sys_prompt = build_system_prompt(CHAT_INSTRUCTIONS, menu_to_str(menu_id))
+                messages_for_api = [{"role": "system", "content": sys_prompt}] + history
+                record_prompt_tokens(self._turns, messages_for_api)
+        if cached is not None:
+            await self._fold_history()
+            return
+        started = time.perf_counter()
+        try:
+            first_token = True
+            async for text in coalesce(get_provider().stream_chat(messages_for_api)):
+                if first_token:
+                    observe("chat_first_token", time.perf_counter() - started)
+                    first_token = False
+                async with self:
+                    self.messages[-1]["content"] += text
+                yield
+            observe("chat_turn", time.perf_counter() - started)
+            fast_path_stats.record_model_turn(time.perf_counter() - started)
+            if RESPONSE_CACHE_ENABLED:
+                async with self:
+                    response_cache.put(*cache_key, self.messages[-1]["content"])
         except Exception as e:
-            logging.exception(f"OpenAI stream failed: {e}")
+            logging.exception(f"Chat stream failed: {e}")
             async with self:
                 self.messages[-1]["content"] = (
                     "Sorry, I'm having trouble connecting right now."
@@ -72,13 +152,25 @@ class ChatState(rx.State):
         finally:
             async with self:
                 self.is_streaming = False
+        await self._fold_history()
 
     @rx.event
-    def handle_send(self, form_data: dict[str, str]):
-        """Handles sending a message from the user."""
+    async def handle_send(self, form_data: dict[str, str]):
+        """Handles sending a message from the user.
+
+        Factual questions the menu answers directly (prices, allergens,
+        sections) are replied to locally; the rest go to the model.
+        """
         message = form_data.get("message", "").strip()
         if not message or self.is_streaming:
             return
         self._add_message(message, "user")
+        self._turns += 1
         self.current_message = ""
+        if FAST_ANSWERS_ENABLED:
+            menu_state = await self.get_state(MenuState)
+            reply = fast_answer(menu_state.current_menu_id, menu_state.menu_data, message)
+            if reply is not None:
+                self._add_message(reply, "assistant")
+                return ChatState.compact_history
         return ChatState.stream_response
\ No newline at end of file
@@ -1,8 +1,10 @@
 import reflex as rx
 from typing import TypedDict, Literal
-import json
-from pathlib import Path
 import logging
+import sqlite3
+from app.services.menu_cache import menu_cache
+from app.services.menu_index import build_menu_index, filter_menu, parse_price
+from app.services.sample_menu import SAMPLE_MENU_DATA
 
 
 class MenuItem(TypedDict):
@@ -17,156 +19,114 @@ class MenuSection(TypedDict):
     items: list[MenuItem]
 
 
-SAMPLE_MENU_DATA = [
-    {
-        "title": "Tapas",
-        "items": [
-            {
-                "name": "Patatas Bravas",
-                "price": 6.5,
-                "ingredients": ["Patatas", "Salsa brava", "Aceite de oliva"],
-                "allergens": [],
-            },
-            {
-                "name": "Jamón Ibérico de Bellota",
-                "price": 24.0,
-                "ingredients": ["Jamón ibérico de bellota", "Picos de pan"],
-                "allergens": ["Gluten"],
-            },
-            {
-                "name": "Croquetas de Jamón",
-                "price": 8.0,
-                "ingredients": ["Jamón", "Bechamel", "Pan rallado"],
-                "allergens": ["Gluten", "Lácteos"],
-            },
-            {
-                "name": "Pan con Tomate",
-                "price": 4.5,
-                "ingredients": ["Pan de coca", "Tomate", "Aceite de oliva", "Sal"],
-                "allergens": ["Gluten"],
-            },
-            {
-                "name": "Aceitunas Aliñadas",
-                "price": 3.5,
-                "ingredients": ["Aceitunas verdes", "Ajo", "Tomillo", "Naranja"],
-                "allergens": [],
-            },
-        ],
-    },
-    {
-        "title": "Platos Principales",
-        "items": [
-            {
-                "name": "Paella Valenciana",
-                "price": 18.5,
-                "ingredients": [
-                    "Arroz bomba",
-                    "Pollo",
-                    "Conejo",
-                    "Judía verde",
-                    "Garrofó",
-                    "Azafrán",
-                ],
-                "allergens": [],
-            },
-            {
-                "name": "Pulpo a la Gallega",
-                "price": 21.0,
-                "ingredients": [
-                    "Pulpo",
-                    "Patatas",
-                    "Pimentón de la Vera",
-                    "Aceite de oliva virgen extra",
-                ],
-                "allergens": ["Moluscos"],
-            },
-            {
-                "name": "Cordero Asado con Patatas a lo Pobre",
-                "price": 25.0,
-                "ingredients": [
-                    "Paletilla de cordero",
-                    "Patatas",
-                    "Pimientos",
-                    "Cebolla",
-                ],
-                "allergens": [],
-            },
-        ],
-    },
-    {
-        "title": "Postres",
-        "items": [
-            {
-                "name": "Tarta de Santiago",
-                "price": 7.0,
-                "ingredients": ["Almendras", "Azúcar", "Huevo", "Limón"],
-                "allergens": ["Frutos de cáscara", "Huevo"],
-            },
-            {
-                "name": "Crema Catalana",
-                "price": 6.5,
-                "ingredients": ["Leche", "Yema de huevo", "Azúcar", "Canela", "Limón"],
-                "allergens": ["Lácteos", "Huevo"],
-            },
-            {
-                "name": "Flan de Huevo Casero",
-                "price": 5.5,
-                "ingredients": ["Huevo", "Leche", "Azúcar", "Caramelo"],
-                "allergens": ["Huevo", "Lácteos"],
-            },
-        ],
-    },
-    {
-        "title": "Bebidas",
-        "items": [
-            {
-                "name": "Estrella Damm",
-                "price": 3.5,
-                "ingredients": ["Agua", "Malta de cebada", "Arroz", "Lúpulo"],
-                "allergens": ["Gluten"],
-            },
-            {
-                "name": "Copa de Sangría",
-                "price": 5.0,
-                "ingredients": ["Vino tinto", "Frutas de temporada", "Azúcar", "Licor"],
-                "allergens": ["Sulfitos"],
-            },
-            {
-                "name": "Agua Mineral (50cl)",
-                "price": 2.5,
-                "ingredients": ["Agua mineral natural"],
-                "allergens": [],
-            },
-        ],
-    },
-]
+SAMPLE_MENU_INDEX = build_menu_index(SAMPLE_MENU_DATA)
 
 
 class MenuState(rx.State):
-    """Holds the state for the digital menu."""
+    """Holds the state for the digital menu.
+
+    A session only records which menu it shows and the version it loaded;
+    the menu itself lives once in the shared menu cache and is read through
+    the `menu_data` and `filtered_menu` computed vars, whose caches are left
+    out of pickled state.
+    """
 
-    menu_data: list[MenuSection] = []
     menu_found: bool = True
     current_menu_id: str = ""
+    menu_version: str = ""
+    excluded_allergens: list[str] = []
+    max_price: str = ""
+    section_filter: str = ""
+    allergen_options: list[str] = []
+    section_options: list[str] = []
+
+    @rx.var(cache=True)
+    def menu_data(self) -> list[MenuSection]:
+        """The shared, read-only sections of the current menu."""
+        if not self.menu_version:
+            return []
+        if self.current_menu_id == "sample":
+            return SAMPLE_MENU_DATA
+        return menu_cache.get(self.current_menu_id) or []
+
+    def __getstate__(self):
+        """Drops the cached menu vars before the state manager pickles the session."""
+        state = super().__getstate__()
+        # Each of them may hold the whole menu (filtered_menu does when no filter is set).
+        for var in type(self).computed_vars.values():
+            state.pop(var._cache_attr, None)
+            state.pop(var._last_updated_attr, None)
+        return state
+
+    @rx.var
+    def filters_active(self) -> bool:
+        """Whether any allergen, price or section filter is set."""
+        return bool(self.excluded_allergens or self.max_price or self.section_filter)
+
+    @rx.var
+    def filtered_menu(self) -> list[MenuSection]:
+        """The menu restricted by the current filters, answered from the menu's index."""
+        if not (self.excluded_allergens or self.max_price or self.section_filter):
+            return self.menu_data
+        filters = (self.excluded_allergens, parse_price(self.max_price), self.section_filter)
+        if self.current_menu_id == "sample":
+            return SAMPLE_MENU_INDEX.filter(SAMPLE_MENU_DATA, *filters)
+        return filter_menu(self.current_menu_id, *filters) or []
+
+    def _set_filter_options(self, index):
+        self.excluded_allergens = []
+        self.max_price = ""
+        self.section_filter = ""
+        self.allergen_options = index.allergens() if index is not None else []
+        self.section_options = [s.title for s in index.sections] if index is not None else []
 
     @rx.event
     def load_menu(self):
-        """Load menu data from a JSON file based on the menu_id from the URL."""
+        """Points the session at the menu_id from the URL and the version now stored."""
         menu_id = self.router.page.params.get("menu_id", "")
         self.current_menu_id = menu_id
         if menu_id == "sample":
-            self.menu_data = SAMPLE_MENU_DATA
+            self.menu_version = "sample"
             self.menu_found = True
+            self._set_filter_options(SAMPLE_MENU_INDEX)
             return
-        menu_path = Path("menus") / f"{menu_id}.json"
         try:
-            with menu_path.open("r") as f:
-                self.menu_data = json.load(f)
+            entry = menu_cache.get_entry(menu_id)
+            if entry is None:
+                raise FileNotFoundError(f"No menu '{menu_id}'")
+            self.menu_version = ":".join(str(part) for part in entry.version)
             self.menu_found = True
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            self._set_filter_options(entry.derive("filter_index", build_menu_index))
+        except (FileNotFoundError, sqlite3.Error) as e:
             logging.exception(f"Could not load menu '{menu_id}': {e}")
             self.menu_found = False
-            self.menu_data = []
+            self.menu_version = ""
+            self._set_filter_options(None)
+
+    @rx.event
+    def toggle_allergen(self, allergen: str):
+        """Hides or shows the items containing an allergen."""
+        if allergen in self.excluded_allergens:
+            self.excluded_allergens = [a for a in self.excluded_allergens if a != allergen]
+        else:
+            self.excluded_allergens = self.excluded_allergens + [allergen]
+
+    @rx.event
+    def set_max_price(self, value: str):
+        """Only shows items up to this price; empty means no limit."""
+        self.max_price = value
+
+    @rx.event
+    def set_section_filter(self, value: str):
+        """Only shows one section; empty means all sections."""
+        self.section_filter = value
+
+    @rx.event
+    def clear_filters(self):
+        """Shows the whole menu again."""
+        self.excluded_allergens = []
+        self.max_price = ""
+        self.section_filter = ""
 
 
 class MenuPageState(rx.State):
@@ -179,6 +139,12 @@ class MenuPageState(rx.State):
         """Sets the active tab."""
         self.active_tab = tab_name
 
+    @rx.event
+    def open_tab_from_url(self):
+        """Opens the tab named in `?tab=`, so links from the static menu page land on chat or call."""
+        tab = self.router.page.params.get("tab", "menu")
+        self.active_tab = tab if tab in ("menu", "chat", "call") else "menu"
+
     @rx.event
     def reset_tab(self):
         """Resets the active tab to 'menu' when the page loads."""
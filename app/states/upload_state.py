@@ -1,37 +1,22 @@
 import reflex as rx
 import asyncio
-import json
 import uuid
-from pathlib import Path
 import logging
-import qrcode
-from io import BytesIO
-from openai import OpenAI
-from pydantic import BaseModel
+import re
+from app.services.menu_cache import menu_cache
+from app.services.upload_index import upload_index, combined_hash
+from app.services.file_io import run_io, save_upload
+from app.api import menu_base_url, public_menu_url, qr_src
+from app.services.jobs import job_queue, DONE, FAILED, QUEUED
+from app.services.menu_jobs import EXTRACT_MENU, extraction_payload
+from app.services.menu_store import new_menu_id
+from app.services.settings import EXTRACTION_MAX_PAGES, JOB_POLL_SECONDS
 
 UPLOAD_ID = "menu_upload"
-import base64
-
-
-def encode_image(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
-
-
-class MenuItem(BaseModel):
-    name: str
-    price: float
-    ingredients: list[str]
-    allergens: list[str]
-
-
-class MenuSection(BaseModel):
-    title: str
-    items: list[MenuItem]
-
-
-class Menu(BaseModel):
-    sections: list[MenuSection]
+PERMANENT_FAILURE_MESSAGE = (
+    "We couldn't read this menu. Please upload clear photos or a PDF"
+    f" of at most {EXTRACTION_MAX_PAGES} pages."
+)
 
 
 class UploadState(rx.State):
@@ -42,43 +27,45 @@ class UploadState(rx.State):
     error_message: str = ""
     qr_code_src: str = ""
     menu_url: str = ""
+    force_reextract: bool = False
+    job_id: str = ""
+    job_progress: int = 0
+    job_message: str = ""
+
+    def _show_menu(self, menu_id: str):
+        """Points the page at `menu_id` and its QR code."""
+        self.menu_url = public_menu_url(menu_id)
+        self.qr_code_src = qr_src(menu_id)
+
+    async def _find_existing_menu(self, digest: str) -> str | None:
+        """Returns the menu already extracted from an identical upload, if it still exists."""
+        if self.force_reextract:
+            await run_io(upload_index.forget, digest)
+            return None
+        menu_id = await run_io(upload_index.lookup, digest)
+        if menu_id is None:
+            return None
+        if await run_io(menu_cache.get, menu_id) is None:
+            await run_io(upload_index.forget, digest)
+            return None
+        return menu_id
+
+    def _watch(self, job_id: str):
+        """Starts following an extraction job and records it in the page URL."""
+        self.job_id = job_id
+        self.uploading = False
+        self.processing = True
+        self.job_progress = 0
+        self.job_message = "Queued"
+        return [
+            rx.call_script(f"window.history.replaceState(null, '', '/upload?job={job_id}')"),
+            UploadState.watch_job,
+        ]
 
-    async def _mock_llm_process(self, file_path: str) -> dict:
-        """A mock function to simulate LLM processing of a menu image."""
-        prompt = """
-
-        parse the pictures of the menu by splitting it into Sections with its name
-
-        each section has a list of items,
-        with name -> simply the name of the item on the menu
-        price -> the price of the food, it can be empty
-        ingredients -> a list of ingredients of the food, if not explecitly stated just empty
-        allergens -> if there is stated the allergens of a food add it
-
-
-
-        """
-        client_openai = OpenAI()
-        encoded_image = encode_image(file_path)
-        response = client_openai.responses.parse(
-            model="gpt-4.1-2025-04-14",
-            input=[
-                {"role": "system", "content": prompt},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "input_text", "text": "parse the menu"},
-                        {
-                            "type": "input_image",
-                            "image_url": f"data:image/jpeg;base64,{encoded_image}",
-                        },
-                    ],
-                },
-            ],
-            text_format=Menu,
-        )
-        event = response.output_parsed.dict()
-        return event
+    @rx.event
+    def set_force_reextract(self, value: bool):
+        """Sets whether identical uploads should be extracted again."""
+        self.force_reextract = value
 
     @rx.event
     def reset_state(self):
@@ -88,11 +75,59 @@ class UploadState(rx.State):
         self.error_message = ""
         self.qr_code_src = ""
         self.menu_url = ""
-        return rx.clear_selected_files(UPLOAD_ID)
+        self.job_id = ""
+        self.job_progress = 0
+        self.job_message = ""
+        return [
+            rx.clear_selected_files(UPLOAD_ID),
+            rx.call_script("window.history.replaceState(null, '', '/upload')"),
+        ]
+
+    @rx.event
+    def resume_job(self):
+        """Picks up the extraction job named in the URL, e.g. after a reconnect."""
+        job_id = self.router.page.params.get("job", "")
+        if re.fullmatch(r"[0-9a-f]{32}", job_id) and job_id != self.job_id:
+            self.error_message = ""
+            self.qr_code_src = ""
+            return self._watch(job_id)
+
+    @rx.event(background=True)
+    async def watch_job(self):
+        """Pushes the progress of the current extraction job into the page."""
+        async with self:
+            job_id = self.job_id
+        while True:
+            job = await run_io(job_queue.get, job_id)
+            async with self:
+                if self.job_id != job_id:
+                    return
+                if job is None:
+                    self.error_message = "This menu upload could not be found."
+                    self.processing = False
+                    return
+                self.job_progress = job["progress"]
+                self.job_message = job["message"]
+                if job["status"] == QUEUED and job["error"]:
+                    self.job_message = "The menu reader hit an error, retrying..."
+                if job["status"] == DONE:
+                    self._show_menu(job["result"]["menu_id"])
+                    self.processing = False
+                    return
+                if job["status"] == FAILED:
+                    logging.error(f"Extraction job {job_id} failed: {job['error']}")
+                    if job["attempts"] < job_queue.max_attempts:
+                        # Gave up without retrying: the upload itself can't be read.
+                        self.error_message = PERMANENT_FAILURE_MESSAGE
+                    else:
+                        self.error_message = "We couldn't read this menu. Please try again."
+                    self.processing = False
+                    return
+            await asyncio.sleep(JOB_POLL_SECONDS)
 
     @rx.event
     async def handle_upload(self, files: list[rx.UploadFile]):
-        """Handle the upload and processing of the menu image."""
+        """Stores the uploaded menu images or PDF and queues their extraction."""
         if not files:
             self.error_message = "Please select a file to upload."
             return
@@ -101,43 +136,34 @@ class UploadState(rx.State):
         self.qr_code_src = ""
         yield
         try:
-            uploaded_file = files[0]
-            upload_data = await uploaded_file.read()
             upload_dir = rx.get_upload_dir()
             upload_dir.mkdir(parents=True, exist_ok=True)
-            unique_filename = f"{uuid.uuid4()}_{uploaded_file.name}"
-            file_path = upload_dir / unique_filename
-            with file_path.open("wb") as f:
-                f.write(upload_data)
-            self.uploading = False
-            self.processing = True
-            yield
-            processed_data = await self._mock_llm_process(file_path)
-            menu_id = str(uuid.uuid4())[:8]
-            menu_dir = Path("menus")
-            menu_dir.mkdir(exist_ok=True)
-            menu_file_path = menu_dir / f"{menu_id}.json"
-            with menu_file_path.open("w") as f:
-                json.dump(processed_data["sections"], f, indent=4)
-            self.menu_url = (
-                f"{self.router.url.scheme}://{self.router.url.netloc}/menu/{menu_id}"
+            file_paths = []
+            digests = []
+            for uploaded_file in files:
+                unique_filename = f"{uuid.uuid4()}_{uploaded_file.name}"
+                file_path = upload_dir / unique_filename
+                digests.append(await save_upload(uploaded_file, file_path))
+                file_paths.append(file_path)
+            digest = combined_hash(digests)
+            existing_menu_id = await self._find_existing_menu(digest)
+            if existing_menu_id is not None:
+                logging.info(f"Upload matches menu '{existing_menu_id}', skipping extraction")
+                for file_path in file_paths:
+                    await run_io(file_path.unlink, missing_ok=True)
+                self._show_menu(existing_menu_id)
+                return
+            payload = extraction_payload(
+                file_paths, digest, new_menu_id(), menu_base_url(), upload_dir
             )
-            qr_img = qrcode.make(self.menu_url)
-            buffer = BytesIO()
-            qr_img.save(buffer, format="PNG")
-            qr_code_data = buffer.getvalue()
-            qr_filename = f"qr_{menu_id}.png"
-            qr_path = upload_dir / qr_filename
-            with qr_path.open("wb") as f:
-                f.write(qr_code_data)
-            self.processing = False
-            self.qr_code_src = qr_filename
+            job_id = await job_queue.enqueue(
+                EXTRACT_MENU, payload, key=None if self.force_reextract else digest
+            )
+            yield self._watch(job_id)
         except Exception as e:
             logging.exception(f"Upload failed: {e}")
             self.error_message = "An unexpected error occurred during upload."
-            self.uploading = False
             self.processing = False
         finally:
             self.uploading = False
-            self.processing = False
-            yield
\ No newline at end of file
+            yield
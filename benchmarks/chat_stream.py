@@ -0,0 +1,70 @@
+"""Counts the state updates and bytes one streamed chat answer costs.
+
+Every flush in ChatState.stream_response re-sends the `messages` list to the
+client, so the bytes per flush are approximated by the JSON size of the
+conversation at that point.
+
+    python -m benchmarks.chat_stream --chunk-size 4 --history 6
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.services.fake_backend import FakeProvider
+from app.services.streaming import coalesce
+
+
+async def run_once(provider, interval_ms: float, max_chars: int, history: int) -> dict:
+    messages = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": "x" * 120}
+        for i in range(history)
+    ]
+    messages.append({"role": "user", "content": "¿Qué me recomiendas?"})
+    messages.append({"role": "assistant", "content": ""})
+    updates = 0
+    sent_bytes = 0
+    started = time.perf_counter()
+    async for text in coalesce(provider.stream_chat(messages[:-1]), interval_ms, max_chars):
+        messages[-1]["content"] += text
+        updates += 1
+        sent_bytes += len(json.dumps({"messages": messages}, ensure_ascii=False).encode())
+    return {
+        "interval_ms": interval_ms,
+        "max_chars": max_chars,
+        "updates": updates,
+        "bytes_sent": sent_bytes,
+        "answer_chars": len(messages[-1]["content"]),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+async def main(args):
+    provider = FakeProvider(
+        latency_ms=0,
+        chunk_size=args.chunk_size,
+        chunk_delay_ms=args.chunk_delay_ms,
+        response_chars=args.response_chars,
+    )
+    results = []
+    for interval_ms, max_chars in [(0, 0), (25, 32), (50, 64), (100, 128), (200, 256)]:
+        results.append(await run_once(provider, interval_ms, max_chars, args.history))
+    print(f"{'interval_ms':>11} {'max_chars':>9} {'updates':>8} {'bytes_sent':>11} {'elapsed_ms':>10}")
+    for r in results:
+        print(
+            f"{r['interval_ms']:>11} {r['max_chars']:>9} {r['updates']:>8} "
+            f"{r['bytes_sent']:>11} {r['elapsed_ms']:>10}"
+        )
+    if args.json:
+        print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunk-size", type=int, default=4)
+    parser.add_argument("--chunk-delay-ms", type=float, default=10)
+    parser.add_argument("--response-chars", type=int, default=1200)
+    parser.add_argument("--history", type=int, default=6)
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(main(parser.parse_args()))
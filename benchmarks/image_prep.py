@@ -0,0 +1,56 @@
+"""Compares the vision payload of raw uploads with the pre-processed image.
+
+Reports, per image, the base64 payload size and encode time for the raw file
+(the old encode_image) and for prepare_image.
+
+    python -m benchmarks.image_prep [uploaded_files/*.jpg ...]
+"""
+
+import argparse
+import base64
+import time
+from pathlib import Path
+
+from app.services.image_prep import prepare_image
+
+DEFAULT_IMAGES = sorted(
+    p
+    for p in Path("uploaded_files").glob("*")
+    if p.suffix.lower() in {".jpg", ".jpeg", ".png"} and not p.name.startswith("qr_")
+)
+
+
+def timed(fn, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) * 1000 / repeat
+
+
+def main(args):
+    paths = [Path(p) for p in args.images] or DEFAULT_IMAGES
+    total_raw = total_prepared = 0
+    print(f"{'image':<48} {'raw_b64':>9} {'prep_b64':>9} {'saved':>6} {'raw_ms':>7} {'prep_ms':>8}")
+    for path in paths:
+        raw_b64, raw_ms = timed(lambda: base64.b64encode(path.read_bytes()), args.repeat)
+        prepared, prep_ms = timed(
+            lambda: base64.b64encode(prepare_image(path)[0]), args.repeat
+        )
+        total_raw += len(raw_b64)
+        total_prepared += len(prepared)
+        print(
+            f"{path.name[-48:]:<48} {len(raw_b64):>9} {len(prepared):>9} "
+            f"{1 - len(prepared) / len(raw_b64):>6.0%} {raw_ms:>7.1f} {prep_ms:>8.1f}"
+        )
+    if total_raw:
+        print(
+            f"total payload {total_raw} -> {total_prepared} bytes "
+            f"({1 - total_prepared / total_raw:.0%} smaller)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
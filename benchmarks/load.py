@@ -0,0 +1,381 @@
+"""Concurrent guest load generator for a running app: menu, chat and call tabs.
+
+Each simulated guest does what the browser does for one table. It opens a
+socket to `/_event` and loads `/menu/<id>` through the hydrate and on_load
+events. Then, for `--rounds` rounds, it switches to the chat tab and sends a
+question through ChatState.handle_send, waiting for the streamed answer. It
+switches to the call tab, records and posts an audio clip to `/_upload` for
+CallState.handle_audio_upload, waits for the segments answer_call streams
+back, and goes back to the menu tab. Guests start spread over
+`--ramp-seconds` and pause `--think-ms` between actions.
+
+Point it at a local backend that runs the fake model backends, so the numbers
+measure the app and not a provider:
+
+    MODEL_BACKEND=fake reflex run --env prod --backend-only
+    python -m benchmarks.load --guests 50 --rounds 3
+
+It reports:
+
+- latency percentiles per action. chat_first_token and call_first_audio are
+  what a guest waits for before something happens.
+- websocket messages and bytes per second in each direction.
+- event loop lag of this process. If it is high, the generator is the
+  bottleneck and the results are not trustworthy.
+- the server's stage histograms from /metrics over the run, including its
+  `event_loop_lag`. These are upper bucket bounds, not exact values.
+
+Raise `--guests` until chat_first_token p95 or the server loop lag stops being
+acceptable; that is how many tables one worker sustains. Its extra
+dependencies are in requirements-bench.txt.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+import reflex as rx
+import socketio
+from reflex.constants import CompileVars
+from reflex.constants.state import FIELD_MARKER
+
+from app.services.menu_repository import menu_repository
+from app.services.settings import FAKE_AUDIO_PATH, MENUS_DIR
+from app.states.call_state import CallState
+from app.states.chat_state import ChatState
+from app.states.menu_state import MenuPageState
+
+EVENT_NAMESPACE = "/_event"
+ROOT_STATE = rx.State.get_full_name()
+HYDRATE = f"{ROOT_STATE}.{CompileVars.HYDRATE}"
+ON_LOAD_INTERNAL = f"{ROOT_STATE}.{CompileVars.ON_LOAD_INTERNAL}"
+SET_ACTIVE_TAB = f"{MenuPageState.get_full_name()}.set_active_tab"
+HANDLE_SEND = f"{ChatState.get_full_name()}.handle_send"
+START_RECORDING = f"{CallState.get_full_name()}.start_recording"
+STOP_RECORDING = f"{CallState.get_full_name()}.stop_recording"
+HANDLE_AUDIO_UPLOAD = f"{CallState.get_full_name()}.handle_audio_upload"
+
+# Mix of questions the fast path answers from the menu and ones that go to the model.
+QUESTIONS = [
+    "¿Qué me recomiendas para cenar?",
+    "¿Qué platos no llevan gluten?",
+    "¿Qué postres tenéis?",
+    "¿Qué cerveza va bien con las tapas?",
+]
+
+_BUCKET = re.compile(r'app_stage_seconds_bucket\{stage="([^"]+)",le="([^"]+)"\} (\d+)')
+
+
+class LoadStats:
+    """Latencies, errors and socket traffic of every guest in the run."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.sent = 0
+        self.sent_bytes = 0
+        self.received = 0
+        self.received_bytes = 0
+
+    async def timed(self, action: str, step):
+        started = time.perf_counter()
+        try:
+            result = await step
+        except Exception as e:
+            self.errors[f"{action}: {type(e).__name__}"] += 1
+            raise
+        self.latencies[action].append((time.perf_counter() - started) * 1000)
+        return result
+
+
+class Guest:
+    """One table: a socket to /_event and the state deltas it has been sent."""
+
+    def __init__(self, url: str, menu_id: str, stats: LoadStats, http: httpx.AsyncClient, timeout: float):
+        self.url = url
+        self.token = str(uuid.uuid4())
+        self.stats = stats
+        self.http = http
+        self.timeout = timeout
+        self.router_data = {
+            "pathname": f"/menu/{menu_id}",
+            "query": {"menu_id": menu_id},
+            "asPath": f"/menu/{menu_id}",
+        }
+        self.state: dict[str, dict] = defaultdict(dict)
+        self.changed = asyncio.Condition()
+        self._final = asyncio.Event()
+        self._chained: list[dict] = []
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on("event", self._on_event, namespace=EVENT_NAMESPACE)
+        self.sio.on("reload", self._on_reload, namespace=EVENT_NAMESPACE)
+
+    async def _apply(self, update: dict):
+        for substate, fields in (update.get("delta") or {}).items():
+            self.state[substate].update(fields)
+        # Client-side events (_call_script, _redirect...) run in the browser; skip them.
+        self._chained += [e for e in update.get("events") or [] if not e["name"].startswith("_")]
+        async with self.changed:
+            self.changed.notify_all()
+
+    async def _on_event(self, update: dict):
+        self.stats.received += 1
+        self.stats.received_bytes += len(json.dumps(update))
+        await self._apply(update)
+        if update.get("final"):
+            self._final.set()
+
+    async def _on_reload(self, event: dict):
+        self.stats.errors["reload"] += 1
+
+    def field(self, state: type[rx.State], name: str, default=None):
+        return self.state[state.get_full_name()].get(name + FIELD_MARKER, default)
+
+    async def wait_until(self, predicate):
+        async with self.changed:
+            await asyncio.wait_for(self.changed.wait_for(predicate), self.timeout)
+
+    async def connect(self):
+        await self.sio.connect(
+            f"{self.url}?token={self.token}",
+            namespaces=[EVENT_NAMESPACE],
+            socketio_path=EVENT_NAMESPACE,
+            transports=["websocket"],
+            wait_timeout=self.timeout,
+        )
+
+    async def close(self):
+        await self.sio.disconnect()
+
+    async def _emit(self, name: str, payload: dict):
+        event = {"token": self.token, "name": name, "router_data": self.router_data, "payload": payload}
+        self.stats.sent += 1
+        self.stats.sent_bytes += len(json.dumps(event))
+        await self.sio.emit("event", event, namespace=EVENT_NAMESPACE)
+
+    async def _drain(self, queue: list[dict]):
+        # Like the frontend: one event at a time, the next after the previous final update.
+        while queue:
+            event = queue.pop(0)
+            self._final.clear()
+            self._chained = []
+            await self._emit(event["name"], event.get("payload") or {})
+            await asyncio.wait_for(self._final.wait(), self.timeout)
+            queue += self._chained
+
+    async def dispatch(self, name: str, **payload):
+        """Sends one event and every event it chains, the way the browser queues them."""
+        await self._drain([{"name": name, "payload": payload}])
+
+    async def open_page(self):
+        await self._drain([{"name": HYDRATE}, {"name": ON_LOAD_INTERNAL}])
+
+    def _chat_reply(self, question: str) -> dict | None:
+        messages = self.field(ChatState, "messages", [])
+        asked = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=None)
+        if asked is None or messages[asked]["content"] != question or asked + 1 >= len(messages):
+            return None
+        reply = messages[asked + 1]
+        return reply if reply["content"] else None
+
+    async def chat(self, question: str):
+        started = time.perf_counter()
+        await self.stats.timed("chat_send", self.dispatch(HANDLE_SEND, form_data={"message": question}))
+        await self.wait_until(lambda: self._chat_reply(question) is not None)
+        self.stats.latencies["chat_first_token"].append((time.perf_counter() - started) * 1000)
+        await self.wait_until(lambda: not self.field(ChatState, "is_streaming", False))
+
+    async def call(self, audio: bytes, think: float):
+        await self.dispatch(START_RECORDING)
+        await asyncio.sleep(think)
+        await self.dispatch(STOP_RECORDING)
+        started = time.perf_counter()
+        self._chained = []
+        headers = {"Reflex-Client-Token": self.token, "Reflex-Event-Handler": HANDLE_AUDIO_UPLOAD}
+        files = {"files": ("recording.webm", audio, "audio/webm")}
+        async with self.http.stream(
+            "POST", f"{self.url}/_upload", files=files, headers=headers, timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    await self._apply(json.loads(line))
+        # The answer is spoken by CallState.answer_call, a background event chained from the upload.
+        await self._drain(self._chained)
+        await self.wait_until(
+            lambda: self.field(CallState, "audio_response_src")
+            or not self.field(CallState, "is_processing")
+        )
+        if not self.field(CallState, "audio_response_src"):
+            raise RuntimeError(self.field(CallState, "error_message") or "no audio in the response")
+        self.stats.latencies["call_first_audio"].append((time.perf_counter() - started) * 1000)
+        await self.wait_until(lambda: not self.field(CallState, "is_processing"))
+
+
+async def run_guest(number: int, menu_id: str, args, stats: LoadStats, http: httpx.AsyncClient, audio: bytes):
+    await asyncio.sleep(args.ramp_seconds * number / args.guests)
+    think = args.think_ms / 1000
+    guest = Guest(args.url, menu_id, stats, http, args.timeout)
+    try:
+        await stats.timed("connect", guest.connect())
+        await stats.timed("page_load", guest.open_page())
+        for round_number in range(args.rounds):
+            await asyncio.sleep(think)
+            await stats.timed("set_tab", guest.dispatch(SET_ACTIVE_TAB, tab_name="chat"))
+            await asyncio.sleep(think)
+            await stats.timed("chat_turn", guest.chat(QUESTIONS[(number + round_number) % len(QUESTIONS)]))
+            await asyncio.sleep(think)
+            await stats.timed("set_tab", guest.dispatch(SET_ACTIVE_TAB, tab_name="call"))
+            await stats.timed("call_turn", guest.call(audio, think))
+            await asyncio.sleep(think)
+            await stats.timed("set_tab", guest.dispatch(SET_ACTIVE_TAB, tab_name="menu"))
+    except Exception:
+        # Counted by LoadStats.timed; a failed guest leaves the table.
+        pass
+    finally:
+        if guest.sio.connected:
+            await guest.close()
+
+
+async def watch_loop_lag(samples: list[float], interval: float = 0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval) * 1000)
+
+
+async def scrape_stages(http: httpx.AsyncClient, url: str) -> dict[str, dict[str, int]]:
+    try:
+        response = await http.get(f"{url}/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    stages: dict[str, dict[str, int]] = defaultdict(dict)
+    for stage, bound, count in _BUCKET.findall(response.text):
+        stages[stage][bound] = int(count)
+    return stages
+
+
+def bucket_percentile(buckets: list[tuple[str, int]], quantile: float) -> str:
+    total = buckets[-1][1]
+    for bound, cumulative in buckets:
+        if cumulative >= quantile * total:
+            return bound if bound == "+Inf" else f"{float(bound) * 1000:g}"
+    return "+Inf"
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * quantile))]
+
+
+async def main(args):
+    # Legacy menus/*.json menus are imported by the server on first view.
+    menu_ids = args.menu or sorted(
+        {menu["id"] for menu in menu_repository.list_menus()}
+        | {path.stem for path in MENUS_DIR.glob("*.json")}
+    )
+    if not menu_ids:
+        raise SystemExit("no menus to load; pass --menu <id>")
+    audio = Path(args.audio).read_bytes()
+    stats = LoadStats()
+    lag: list[float] = []
+    limits = httpx.Limits(max_connections=args.guests, max_keepalive_connections=args.guests)
+    async with httpx.AsyncClient(limits=limits) as http:
+        before = await scrape_stages(http, args.url)
+        lag_task = asyncio.create_task(watch_loop_lag(lag))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_guest(n, menu_ids[n % len(menu_ids)], args, stats, http, audio)
+                for n in range(args.guests)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        lag_task.cancel()
+        after = await scrape_stages(http, args.url)
+
+    print(f"{args.guests} guests x {args.rounds} rounds on {len(menu_ids)} menus in {elapsed:.1f}s")
+    print(f"{'action':<18} {'n':>6} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'max_ms':>9}")
+    summary = {"guests": args.guests, "rounds": args.rounds, "elapsed_s": round(elapsed, 2), "actions": {}}
+    for action, values in sorted(stats.latencies.items()):
+        row = {
+            "n": len(values),
+            "p50_ms": round(statistics.median(values), 1),
+            "p95_ms": round(percentile(values, 0.95), 1),
+            "p99_ms": round(percentile(values, 0.99), 1),
+            "max_ms": round(max(values), 1),
+        }
+        summary["actions"][action] = row
+        print(
+            f"{action:<18} {row['n']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}"
+            f" {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}"
+        )
+    for error, count in stats.errors.most_common():
+        print(f"ERROR {error} x{count}")
+    summary["errors"] = dict(stats.errors)
+
+    summary["websocket"] = {
+        "sent_per_s": round(stats.sent / elapsed, 1),
+        "sent_kb_per_s": round(stats.sent_bytes / 1024 / elapsed, 1),
+        "received_per_s": round(stats.received / elapsed, 1),
+        "received_kb_per_s": round(stats.received_bytes / 1024 / elapsed, 1),
+    }
+    ws = summary["websocket"]
+    print(
+        f"websocket: sent {stats.sent} msgs ({ws['sent_per_s']}/s, {ws['sent_kb_per_s']} KB/s),"
+        f" received {stats.received} msgs ({ws['received_per_s']}/s, {ws['received_kb_per_s']} KB/s)"
+    )
+    if lag:
+        summary["client_loop_lag_ms"] = {
+            "p50": round(statistics.median(lag), 2),
+            "p99": round(percentile(lag, 0.99), 2),
+            "max": round(max(lag), 2),
+        }
+        print(f"generator loop lag ms: {summary['client_loop_lag_ms']}")
+
+    server = {}
+    for stage, counts in sorted(after.items()):
+        buckets = [(bound, count - before.get(stage, {}).get(bound, 0)) for bound, count in counts.items()]
+        if buckets and buckets[-1][1] > 0:
+            server[stage] = {
+                "n": buckets[-1][1],
+                **{f"p{int(q * 100)}_ms": bucket_percentile(buckets, q) for q in (0.5, 0.95, 0.99)},
+            }
+    if server:
+        print("server stages over the run (upper bucket bounds):")
+        print(f"{'stage':<22} {'n':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+        for stage, row in server.items():
+            print(f"{stage:<22} {row['n']:>7} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+    else:
+        print(f"no stage histograms at {args.url}/metrics")
+    summary["server_stages"] = server
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=4), encoding="utf-8")
+        print(f"saved results to {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://localhost:8000", help="backend URL")
+    parser.add_argument("--guests", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--ramp-seconds", type=float, default=5)
+    parser.add_argument("--think-ms", type=float, default=500)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument(
+        "--menu", action="append", help="menu id; defaults to every stored and menus/*.json menu"
+    )
+    parser.add_argument("--audio", default=str(FAKE_AUDIO_PATH), help="clip posted as the recording")
+    parser.add_argument("--json", help="also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
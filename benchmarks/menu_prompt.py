@@ -0,0 +1,46 @@
+"""Reports prompt size per menu: raw indent=4 JSON versus the compact prompt form.
+
+Token counts use tiktoken's o200k_base encoding when it is installed and fall
+back to a chars/4 estimate otherwise.
+
+    python -m benchmarks.menu_prompt
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from app.services.menu_prompt import compact_menu
+from app.services.settings import MENUS_DIR
+
+
+def token_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return lambda text: len(text) // 4, "chars/4"
+    encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text)), "o200k_base"
+
+
+def main(args):
+    count_tokens, method = token_counter()
+    rows = []
+    for path in sorted(Path(args.menus_dir).glob("*.json")):
+        raw = path.read_text(encoding="utf-8")
+        compact = compact_menu(json.loads(raw))
+        before, after = count_tokens(raw), count_tokens(compact)
+        rows.append((path.stem, len(raw), len(compact), before, after))
+    print(f"token counts via {method}")
+    print(f"{'menu':<14} {'raw_bytes':>9} {'compact_bytes':>13} {'raw_tokens':>10} {'compact_tokens':>14} {'saved':>6}")
+    for menu_id, raw_bytes, compact_bytes, before, after in rows:
+        saved = 1 - after / before if before else 0
+        print(
+            f"{menu_id:<14} {raw_bytes:>9} {compact_bytes:>13} {before:>10} {after:>14} {saved:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--menus-dir", default=str(MENUS_DIR))
+    main(parser.parse_args())
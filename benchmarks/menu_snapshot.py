@@ -0,0 +1,105 @@
+"""Compares loading a menu with json.load, from SQLite and from a binary snapshot.
+
+Menus from menus/*.json are imported into a scratch store. For each loader it
+reports:
+
+- cold: the first load in a fresh interpreter.
+- warm: the mean of repeated loads in this process.
+- RSS: how much resident memory the fresh interpreter gained while loading
+  and holding every menu.
+
+The snapshot loader includes the version lookup a snapshot can't be read
+without. "cached" is `MenuCache` over SQLite, the default path: its warm
+figure is a cache hit, which skips the version lookup until the entry is
+MENU_CACHE_REVALIDATE_SECONDS old.
+
+    python -m benchmarks.menu_snapshot [--repeat 200]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.menu_cache import MenuCache
+from app.services.menu_repository import MenuRepository
+from app.services.menu_snapshot import SnapshotMenuSource, read_snapshot
+
+LOADERS = ("json", "sqlite", "snapshot", "cached")
+
+
+def rss_kb() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4
+
+
+def make_loader(name: str, menus_dir: Path, data_dir: Path):
+    repository = MenuRepository(path=data_dir / "menus.sqlite3", legacy_dir=None)
+    source = SnapshotMenuSource(repository, data_dir / "snapshots")
+    if name == "json":
+        return lambda menu_id: json.loads((menus_dir / f"{menu_id}.json").read_bytes())
+    if name == "sqlite":
+        return repository.get_sections
+    if name == "cached":
+        return MenuCache(source=repository).get
+    return lambda menu_id: read_snapshot(source.path(menu_id), repository.version(menu_id))
+
+
+def child(args):
+    """Runs in a fresh interpreter: times the first load and measures RSS growth."""
+    loader = make_loader(args.child, Path(args.menus_dir), Path(args.data_dir))
+    menu_ids = args.menu_ids
+    before = rss_kb()
+    started = time.perf_counter()
+    held = [loader(menu_ids[0])]
+    cold_ms = (time.perf_counter() - started) * 1000
+    held.extend(loader(menu_id) for menu_id in menu_ids[1:])
+    print(json.dumps({"cold_ms": cold_ms, "rss_kb": rss_kb() - before, "menus": len(held)}))
+
+
+def main(args):
+    menus_dir = Path(args.menus_dir)
+    menu_ids = sorted(path.stem for path in menus_dir.glob("*.json"))
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        repository = MenuRepository(path=data_dir / "menus.sqlite3", legacy_dir=None)
+        repository.import_json_dir(menus_dir)
+        source = SnapshotMenuSource(repository, data_dir / "snapshots")
+        for menu_id in menu_ids:
+            source.compile(menu_id)
+        json_bytes = sum((menus_dir / f"{m}.json").stat().st_size for m in menu_ids)
+        snap_bytes = sum(source.path(m).stat().st_size for m in menu_ids)
+        print(f"{len(menu_ids)} menus: json {json_bytes} bytes, snapshots {snap_bytes} bytes")
+        print(f"{'loader':<9} {'cold_ms':>8} {'warm_us':>8} {'rss_kb':>7}")
+        for name in LOADERS:
+            cold = json.loads(
+                subprocess.run(
+                    [
+                        sys.executable, "-m", "benchmarks.menu_snapshot",
+                        "--child", name, "--menus-dir", str(menus_dir),
+                        "--data-dir", str(data_dir), *menu_ids,
+                    ],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+            )
+            loader = make_loader(name, menus_dir, data_dir)
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                for menu_id in menu_ids:
+                    loader(menu_id)
+            warm_us = (time.perf_counter() - started) * 1e6 / (args.repeat * len(menu_ids))
+            print(f"{name:<9} {cold['cold_ms']:>8.2f} {warm_us:>8.1f} {cold['rss_kb']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("menu_ids", nargs="*")
+    parser.add_argument("--menus-dir", default="menus")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--child", choices=LOADERS)
+    parser.add_argument("--data-dir")
+    args = parser.parse_args()
+    child(args) if args.child else main(args)
@@ -0,0 +1,95 @@
+"""Compares per-session menu state: a full menu copy versus a real MenuState.
+
+Reflex's Redis and disk state managers pickle each session's state and
+unpickle it on the next event, so every session restored that way holds its
+own copy of whatever the state contains. "copied" models MenuState's fields
+from before the menu moved into the shared menu cache. "MenuState" is the
+real state class, with its computed vars evaluated the way a page render
+leaves them, so a cached var that drags the menu into the pickle shows up
+here. N sessions go through a pickle round trip and, per session, it reports:
+
+- bytes: size of the pickled state.
+- mem_kb: memory the restored session keeps alive (tracemalloc).
+- us: time to pickle and unpickle it.
+
+    python -m benchmarks.session_state [--sessions 200]
+"""
+
+import argparse
+import json
+import pickle
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.services.menu_cache import menu_cache
+from app.services.menu_index import build_menu_index
+from app.services.menu_repository import MenuRepository
+from app.services.settings import MENUS_DIR
+from app.states.menu_state import MenuState
+
+FILTERS = {
+    "menu_found": True,
+    "excluded_allergens": [],
+    "max_price": "",
+    "section_filter": "",
+}
+
+
+def copied_state(menu_id: str, sections: list) -> dict:
+    allergens = sorted({a for s in sections for i in s["items"] for a in i.get("allergens") or []})
+    options = {"allergen_options": allergens, "section_options": [s["title"] for s in sections]}
+    return {"current_menu_id": menu_id, "menu_data": sections, **FILTERS, **options}
+
+
+def menu_state(menu_id: str) -> MenuState:
+    """A MenuState pointed at `menu_id`, as `load_menu` and the first render leave it."""
+    state = MenuState(_reflex_internal_init=True, init_substates=False)
+    entry = menu_cache.get_entry(menu_id)
+    state.current_menu_id = menu_id
+    state.menu_version = ":".join(str(part) for part in entry.version)
+    state._set_filter_options(entry.derive("filter_index", build_menu_index))
+    for name in MenuState.computed_vars:
+        getattr(state, name)
+    return state
+
+
+def measure(state, sessions: int) -> tuple[int, float, float]:
+    blob = pickle.dumps(state)
+    started = time.perf_counter()
+    for _ in range(sessions):
+        pickle.loads(pickle.dumps(state))
+    round_trip_us = (time.perf_counter() - started) * 1e6 / sessions
+    tracemalloc.start()
+    restored = [pickle.loads(blob) for _ in range(sessions)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del restored
+    return len(blob), retained / sessions / 1024, round_trip_us
+
+
+def main(args):
+    menus_dir = Path(args.menus_dir)
+    path = max(menus_dir.glob("*.json"), key=lambda p: p.stat().st_size)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    sections = data["sections"] if isinstance(data, dict) else data
+    with tempfile.TemporaryDirectory() as tmp:
+        # A scratch store, so the benchmark never imports menus into the real one.
+        menu_cache.source = MenuRepository(path=Path(tmp) / "menus.sqlite3", legacy_dir=menus_dir)
+        states = {"copied": copied_state(path.stem, sections), "MenuState": menu_state(path.stem)}
+        print(f"menu {path.stem} ({path.stat().st_size} bytes of JSON), {args.sessions} sessions")
+        print(f"{'state':<9} {'bytes':>7} {'mem_kb':>7} {'us':>7} {'total_kb':>9}")
+        for name, state in states.items():
+            size, mem_kb, round_trip_us = measure(state, args.sessions)
+            print(
+                f"{name:<9} {size:>7} {mem_kb:>7.1f} {round_trip_us:>7.1f}"
+                f" {size * args.sessions / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--menus-dir", default=str(MENUS_DIR))
+    parser.add_argument("--sessions", type=int, default=200)
+    main(parser.parse_args())
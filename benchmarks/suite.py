@@ -0,0 +1,228 @@
+"""Offline micro-benchmark suite with JSON baselines and regression checks.
+
+Runs against the real menus/*.json and uploaded_files/*.jpg fixtures, with
+the fake model backend and a scratch data and upload dir, so nothing leaves
+the machine and the working tree is not touched. For each case it reports the
+median and p95 time of `--repeat` runs and the peak traced memory of one run:
+
+- menu_load_cold / menu_load_warm: what MenuState.load_menu does, i.e. the
+  menu cache lookup plus the filter index, after an invalidation / when cached.
+- menu_to_str_json / menu_to_str_compact: the old indent=4 JSON prompt and
+  the cached compact prompt that menu_to_str returns now. The old code is
+  gone, so menu_to_str_json is a re-implementation of it, not the original.
+- encode_image: pre-processing and base64 of each uploaded photo.
+- qr_png / qr_svg: rendering one menu QR code.
+- upload_pipeline: a full upload, from saving the file and hashing it through
+  extraction, storage, indexing and static page pre-render of the menu.
+
+Baselines are machine-specific, so record them where the comparison runs:
+
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.25
+
+A comparison exits with status 1 when any case's median time or peak memory
+grows by more than the threshold.
+"""
+
+import argparse
+import asyncio
+import atexit
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="menu-bench-"))
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+os.environ.update(
+    APP_DATA_DIR=str(SCRATCH / "data"),
+    REFLEX_UPLOADED_FILES_DIR=str(SCRATCH / "uploads"),
+    MODEL_BACKEND="fake",
+    FAKE_LATENCY_MS="0",
+    FAKE_CHUNK_DELAY_MS="0",
+    TTS_WARMUP_ENABLED="0",
+)
+
+from app.services.extraction import encode_image  # noqa: E402
+from app.services.file_io import save_upload  # noqa: E402
+from app.services.jobs import JobQueue  # noqa: E402
+from app.services.menu_cache import menu_cache  # noqa: E402
+from app.services.menu_html import static_menu_page  # noqa: E402
+from app.services.menu_index import build_menu_index  # noqa: E402
+from app.services.menu_jobs import EXTRACT_MENU, extraction_payload, run_extract_menu  # noqa: E402
+from app.services.menu_prompt import menu_prompt  # noqa: E402
+from app.services.menu_store import new_menu_id, on_menu_saved  # noqa: E402
+from app.services.qr import render_qr  # noqa: E402
+from app.services.settings import MENUS_DIR, UPLOAD_DIR  # noqa: E402
+from app.services.upload_index import combined_hash  # noqa: E402
+
+IMAGES = sorted(
+    p
+    for p in Path("uploaded_files").glob("*")
+    if p.suffix.lower() in {".jpg", ".jpeg", ".png"} and not p.name.startswith("qr_")
+)
+
+
+# app.api registers the page pre-render as a save hook, but importing it needs
+# Reflex, so the suite registers the same render with a fixed app URL.
+on_menu_saved(lambda menu_id: static_menu_page(menu_id, "http://bench"))
+
+# Cases that do not time the code the app runs, with why.
+NOTES = {
+    "menu_to_str_json": "re-implements the removed indent=4 prompt; not the original code path",
+}
+
+
+class _Upload:
+    """The part of rx.UploadFile that save_upload reads."""
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.file = io.BytesIO(data)
+
+
+def menu_load(menu_ids: list[str], cold: bool):
+    def run():
+        for menu_id in menu_ids:
+            if cold:
+                menu_cache.invalidate(menu_id)
+            entry = menu_cache.get_entry(menu_id)
+            entry.derive("filter_index", build_menu_index)
+
+    return run
+
+
+def menu_to_str_json(menu_ids: list[str]):
+    def run():
+        for menu_id in menu_ids:
+            data = json.loads((MENUS_DIR / f"{menu_id}.json").read_text(encoding="utf-8"))
+            json.dumps(data, indent=4)
+
+    return run
+
+
+def menu_to_str_compact(menu_ids: list[str]):
+    def run():
+        for menu_id in menu_ids:
+            menu_prompt(menu_id)
+
+    return run
+
+
+def encode_images():
+    for image in IMAGES:
+        encode_image(image)
+
+
+def qr(fmt: str):
+    return lambda: render_qr(f"https://menus.example.com/m/{new_menu_id()}", fmt, 512)
+
+
+def upload_pipeline(queue: JobQueue):
+    image = IMAGES[0]
+    data = image.read_bytes()
+
+    async def run():
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        path = UPLOAD_DIR / f"{new_menu_id()}_{image.name}"
+        digest = combined_hash([await save_upload(_Upload(image.name, data), path)])
+        payload = extraction_payload([path], digest, new_menu_id(), "http://bench", UPLOAD_DIR)
+        job = queue.get(queue.submit(EXTRACT_MENU, payload))
+        await run_extract_menu(job, queue)
+
+    return run
+
+
+def cases() -> dict:
+    menu_ids = sorted(path.stem for path in MENUS_DIR.glob("*.json"))
+    queue = JobQueue(path=SCRATCH / "data" / "bench-jobs.sqlite3")
+    return {
+        "menu_load_cold": menu_load(menu_ids, cold=True),
+        "menu_load_warm": menu_load(menu_ids, cold=False),
+        "menu_to_str_json": menu_to_str_json(menu_ids),
+        "menu_to_str_compact": menu_to_str_compact(menu_ids),
+        "encode_image": encode_images,
+        "qr_png": qr("png"),
+        "qr_svg": qr("svg"),
+        "upload_pipeline": upload_pipeline(queue),
+    }
+
+
+def measure(fn, repeat: int, loop: asyncio.AbstractEventLoop) -> dict:
+    call = (lambda: loop.run_until_complete(fn())) if asyncio.iscoroutinefunction(fn) else fn
+    call()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times), 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("median_ms", "peak_kb"):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{name} {metric}: {base[metric]} -> {result[metric]} "
+                    f"(+{result[metric] / base[metric] - 1:.0%})"
+                )
+    return regressions
+
+
+def main(args):
+    all_cases = cases()
+    selected = args.cases or list(all_cases)
+    loop = asyncio.new_event_loop()
+    results = {}
+    print(f"{'case':<20} {'median_ms':>10} {'p95_ms':>9} {'peak_kb':>9}")
+    for name in selected:
+        results[name] = measure(all_cases[name], args.repeat, loop)
+        r = results[name]
+        print(f"{name:<20} {r['median_ms']:>10.3f} {r['p95_ms']:>9.3f} {r['peak_kb']:>9.1f}")
+    loop.close()
+    for name in selected:
+        if name in NOTES:
+            print(f"note: {name} {NOTES[name]}")
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=4), encoding="utf-8")
+        print(f"saved baseline to {args.save}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("cases", nargs="*")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    main(parser.parse_args())
@@ -0,0 +1,62 @@
+from app.services.fast_answers import answer, build_catalog
+from app.services.sample_menu import SAMPLE_MENU_DATA
+
+CATALOG = build_catalog(SAMPLE_MENU_DATA)
+
+
+def test_free_of_question_about_an_item_named_after_an_ingredient():
+    reply = answer(CATALOG, "is the jamón iberico gluten free?")
+    assert reply == "No, **Jamón Ibérico de Bellota** contains Gluten."
+
+
+def test_free_of_question_about_an_ambiguous_name_answers_each_item():
+    reply = answer(CATALOG, "is the jamon gluten free")
+    assert reply.startswith("- **Jamón Ibérico de Bellota**: contains Gluten\n")
+    assert "- **Croquetas de Jamón**: contains Gluten\n" in reply
+    assert "Without Gluten" not in reply
+
+
+def test_free_of_question_about_an_item_without_the_allergen():
+    reply = answer(CATALOG, "¿la paella es sin gluten?")
+    assert reply.startswith("La carta no indica Gluten en **Paella Valenciana**")
+
+
+def test_free_of_question_about_an_item_with_the_allergen():
+    assert answer(CATALOG, "are the croquetas dairy free?") == (
+        "No, **Croquetas de Jamón** contains Lácteos."
+    )
+
+
+def test_contains_question_about_an_item_named_after_an_ingredient():
+    assert answer(CATALOG, "does the pulpo have shellfish") == (
+        "Yes, **Pulpo a la Gallega** contains Moluscos."
+    )
+    assert answer(CATALOG, "¿el pulpo lleva marisco?") == (
+        "Sí, **Pulpo a la Gallega** lleva Moluscos."
+    )
+
+
+def test_contains_question_uses_the_ingredients_too():
+    assert answer(CATALOG, "¿la tarta de santiago lleva huevo?") == (
+        "Sí, **Tarta de Santiago** lleva Huevo."
+    )
+
+
+def test_contains_question_about_an_item_without_the_allergen():
+    reply = answer(CATALOG, "¿Lleva gluten el flan?")
+    assert reply.startswith("La carta no indica Gluten en **Flan de Huevo Casero**")
+
+
+def test_ingredient_after_with_lists_every_item_not_the_one_named_after_it():
+    reply = answer(CATALOG, "hay algo con huevo?")
+    assert reply.splitlines()[1:4] == [
+        "- Tarta de Santiago",
+        "- Crema Catalana",
+        "- Flan de Huevo Casero",
+    ]
+    assert "Jamón" in answer(CATALOG, "anything with jamon?")
+
+
+def test_pairing_questions_go_to_the_model():
+    assert answer(CATALOG, "which wine goes with the lamb") is None
+    assert answer(CATALOG, "¿Qué vino va con el pulpo?") is None